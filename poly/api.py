@@ -0,0 +1,154 @@
+import json
+
+from poly.common import *
+from poly.metrics import count_error, timed
+from poly.reader import read_exprs
+
+COMPLETION_LIMIT = 20
+
+class ServerError(Exception):
+    def __init__(self, message):
+        self.message = message
+
+class InternalError(PolyError):
+    def __init__(self, error):
+        self.message = "Internal error: {}: {}".format(
+            error.__class__.__name__, error)
+        self.error = error
+
+def check_name(name):
+    if name is None:
+        raise ServerError("No input given")
+
+    if len(name) <= 2:
+        raise ServerError("Input must be longer than 2 characters")
+
+def complete(node, name):
+    check_name(name)
+    return node.complete(name, COMPLETION_LIMIT)
+
+def eval_source(node, s, metrics=None):
+    try:
+        expr = timed(metrics, "read", node.read, s)
+        val = timed(metrics, "eval", node.eval, expr)
+        return "expr", node.show(val)
+    except Exception as e:
+        return eval_error(e, metrics)
+
+def profile_source(node, s):
+    try:
+        expr = node.read(s)
+        val, profiler = node.profile(expr)
+        s = node.show(val)
+    except PolyError as e:
+        return "error", e.message, "", ""
+    except Exception as e:
+        return "error", InternalError(e).message, "", ""
+
+    return "expr", s, profiler.report(), profiler.collapsed()
+
+def eval_forms(node, s, metrics=None):
+    exprs = read_exprs(s)
+
+    while True:
+        try:
+            expr = timed(metrics, "read", next, exprs, None)
+        except Exception as e:
+            yield eval_error(e, metrics)
+            return
+
+        if expr is None:
+            return
+
+        try:
+            val = timed(metrics, "eval", node.eval, expr)
+            s = node.show(val)
+        except Exception as e:
+            yield eval_error(e, metrics)
+            continue
+
+        yield "expr", s
+
+def eval_error(error, metrics=None):
+    if not isinstance(error, PolyError):
+        error = InternalError(error)
+
+    count_error(metrics, error)
+    return "error", error.message
+
+def eval_batch(node, batch, stop_on_error=False, metrics=None):
+    if isinstance(batch, str):
+        results = eval_forms(node, batch, metrics)
+    else:
+        results = (eval_source(node, s, metrics) for s in batch)
+
+    for kind, value in results:
+        yield kind, value
+
+        if stop_on_error and kind == "error":
+            return
+
+def parse_batch(content_type, body):
+    try:
+        s = body.decode("utf-8")
+    except UnicodeDecodeError:
+        raise ServerError("Input must be UTF-8")
+
+    if not content_type.startswith("application/json"):
+        return s
+
+    try:
+        batch = json.loads(s)
+    except ValueError:
+        batch = None
+
+    if not isinstance(batch, list) or \
+            not all(isinstance(s, str) for s in batch):
+        raise ServerError("Input must be a JSON array of strings")
+
+    return batch
+
+def json_array(resps):
+    sep = "["
+
+    for resp in resps:
+        yield sep + json.dumps(resp)
+        sep = ","
+
+    yield "[]" if sep == "[" else "]"
+
+def result_resp(kind, value):
+    if kind == "error":
+        return error_resp(ServerError(value))
+    else:
+        return expr_resp(value)
+
+def profile_resp(kind, value, report, stacks):
+    resp = result_resp(kind, value)
+    resp["report"] = report
+    resp["stacks"] = stacks
+
+    return resp
+
+def expr_resp(val):
+    return {
+        "type": "expr",
+        "value": str(val)
+    }
+
+def output_resp(s):
+    return {
+        "type": "output",
+        "value": s
+    }
+
+def values_resp(vals):
+    return {
+        "values": list(vals)
+    }
+
+def error_resp(error):
+    return {
+        "type": "error",
+        "message": error.message
+    }
@@ -0,0 +1,192 @@
+from functools import partial, reduce
+from itertools import chain
+
+from poly.common import *
+from poly.expr import *
+from poly.printer import show
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class NumpyMissingError(PolyError):
+    def __init__(self):
+        self.message = "Arrays require numpy, which isn't installed"
+
+class EmptyArrayError(PolyError):
+    def __init__(self, expr):
+        self.message = "{} is empty".format(show(expr))
+        self.expr = expr
+
+class ShapeError(PolyError):
+    def __init__(self, shapes):
+        self.message = "Can't combine arrays of shapes {}".format(
+            " and ".join(str(shape) for shape in shapes))
+        self.shapes = shapes
+
+class IntOverflowError(PolyError):
+    def __init__(self, name):
+        self.message = "Result of {} doesn't fit in an integer array".format(
+            name)
+        self.name = name
+
+def require_numpy():
+    if numpy is None:
+        raise NumpyMissingError()
+
+class Array(Coll):
+    _ORDER = 14
+
+    def __init__(self, data):
+        data.flags.writeable = False
+        self.data = data
+
+    @classmethod
+    def from_exprs(cls, exprs):
+        require_numpy()
+        exprs = list(exprs)
+        vals, typ = unwrap_nums(exprs)
+        dtype = numpy.float64 if typ is Float else numpy.int64
+
+        try:
+            return cls(numpy.array(vals, dtype=dtype))
+        except OverflowError:
+            info = numpy.iinfo(dtype)
+
+            for expr in exprs:
+                if not info.min <= expr.value <= info.max:
+                    raise InvalidTypeError(expr, Int)
+
+            raise
+
+    def __len__(self):
+        return len(self.data)
+
+    def values(self):
+        return map(box, self.data)
+
+    def nth(self, i):
+        if i < 0 or i >= len(self):
+            raise OutOfRangeError(self, i)
+
+        return box(self.data[i])
+
+    def slice(self, start, end=None):
+        l = len(self)
+
+        if end is None:
+            end = l
+
+        if start < 0 or start > l:
+            raise OutOfRangeError(self, start)
+        elif end < start or end > l:
+            raise OutOfRangeError(self, end)
+
+        return Array(self.data[start:end])
+
+    def reduce(self, name):
+        if len(self) == 0 and name != "sum":
+            raise EmptyArrayError(self)
+
+        if name == "sum" and is_int(self.data):
+            return box(self.data.sum(dtype=object))
+
+        return box(getattr(self.data, name)())
+
+    def print_parts(self, limit):
+        return "(", chain(["array"], self.values()), ")"
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        elif not isinstance(other, Array) or hashes_differ(self, other):
+            return False
+
+        return self.data.dtype == other.data.dtype and \
+            numpy.array_equal(self.data, other.data)
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash((self.data.dtype.str, self.data.tobytes()))
+            return self._hash
+
+def box(x):
+    if isinstance(x, (int, numpy.integer)):
+        return Int(int(x))
+    else:
+        return Float(float(x))
+
+def array_value(expr):
+    if isinstance(expr, Array):
+        return expr.data
+    elif isinstance(expr, Num):
+        return expr.value
+    else:
+        raise InvalidTypeError(expr, Num)
+
+def is_int(val):
+    if isinstance(val, numpy.ndarray):
+        return val.dtype.kind == "i"
+    else:
+        return isinstance(val, (int, numpy.integer))
+
+def magnitude(val):
+    if not isinstance(val, numpy.ndarray):
+        return abs(int(val))
+    elif val.size == 0:
+        return 0
+    else:
+        return max(int(val.max()), -int(val.min()))
+
+def int_math(name, x, y):
+    op = array_ops[name]
+
+    if name == "/" or not (is_int(x) and is_int(y)):
+        return op(x, y)
+
+    mx = magnitude(x)
+    my = magnitude(y)
+    bound = mx * my if name == "*" else mx + my
+
+    if bound <= INT_MAX:
+        return op(x, y)
+
+    exact = numpy.asarray(op(numpy.asarray(x, dtype=object),
+                             numpy.asarray(y, dtype=object)), dtype=object)
+
+    if magnitude(exact) > INT_MAX:
+        raise IntOverflowError(name)
+
+    return exact.astype(numpy.int64)
+
+def array_math(name, exprs):
+    vals = [array_value(expr) for expr in exprs]
+
+    if len(vals) == 1:
+        if name == "-" and is_int(vals[0]):
+            return Array(int_math(name, 0, vals[0]))
+        elif name == "-":
+            return Array(numpy.negative(vals[0]))
+        elif name == "/":
+            return Array(numpy.true_divide(1.0, vals[0]))
+
+        return exprs[0]
+
+    try:
+        return Array(reduce(partial(int_math, name), vals))
+    except ValueError:
+        shapes = [val.shape for val in vals if isinstance(val, numpy.ndarray)]
+        raise ShapeError(shapes)
+
+if numpy is not None:
+    INT_MAX = int(numpy.iinfo(numpy.int64).max)
+
+    array_ops = {
+        "+": numpy.add,
+        "-": numpy.subtract,
+        "*": numpy.multiply,
+        "/": numpy.true_divide,
+    }
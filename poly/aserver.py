@@ -0,0 +1,372 @@
+import asyncio
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from poly.common import *
+from poly.node import *
+from poly.api import *
+from poly.repl import PRELUDE, PRELUDE_IMAGE
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_BODY = 1 << 20
+EVAL_BUDGET = 2000000
+
+STATIC_FILES = {
+    "/": "repl.html",
+    "/favicon.ico": "favicon.ico",
+}
+
+STATIC_DIRS = ["/img/", "/css/", "/js/"]
+
+OP_CONT = 0x0
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+STATUS = {
+    101: "Switching Protocols",
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+def server_main(args):
+    port = 8000
+    budget = EVAL_BUDGET
+
+    try:
+        port = int(args[0])
+        budget = int(args[1])
+    except:
+        pass
+
+    node = Node("main", budget=budget)
+    node.boot(PRELUDE, PRELUDE_IMAGE)
+
+    server = AsyncServer(node)
+    asyncio.run(server.serve("0.0.0.0", port))
+
+class HttpError(Exception):
+    def __init__(self, status):
+        self.status = status
+
+class Request:
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def param(self, params, name):
+        vals = params.get(name)
+        return vals[0] if vals else None
+
+    def query_param(self, name):
+        return self.param(self.query, name)
+
+    def form_param(self, name):
+        params = parse_qs(self.body.decode("utf-8"), keep_blank_values=True)
+        return self.param(params, name)
+
+async def read_request(reader):
+    line = await reader.readline()
+
+    if not line:
+        return None
+
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400)
+
+    headers = {}
+
+    while True:
+        line = await reader.readline()
+
+        if line in (b"\r\n", b"\n", b""):
+            break
+
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(400)
+
+    if length < 0:
+        raise HttpError(400)
+    elif length > MAX_BODY:
+        raise HttpError(413)
+
+    body = await reader.readexactly(length) if length else b""
+    parts = urlsplit(target)
+
+    return Request(method, parts.path, parse_qs(parts.query), headers, body)
+
+def write_response(writer, status, body=None, content_type=None, headers=()):
+    lines = ["HTTP/1.1 {} {}".format(status, STATUS[status])]
+
+    if content_type is not None:
+        lines.append("Content-Type: " + content_type)
+
+    if body is not None:
+        lines.append("Content-Length: {}".format(len(body)))
+
+    lines.extend(headers)
+    head = "\r\n".join(lines) + "\r\n\r\n"
+
+    writer.write(head.encode("latin-1") + (body or b""))
+
+def write_chunk(writer, s):
+    data = s.encode("utf-8")
+    writer.write(b"%x\r\n" % len(data) + data + b"\r\n")
+
+def write_json(writer, data):
+    body = json.dumps(data).encode("utf-8")
+    write_response(writer, 200, body, "application/json")
+
+def static_path(path):
+    if path in STATIC_FILES:
+        return os.path.join("static", STATIC_FILES[path])
+
+    for prefix in STATIC_DIRS:
+        if path.startswith(prefix):
+            rel = os.path.normpath(path[1:])
+
+            if rel.startswith(prefix[1:]):
+                return os.path.join("static", rel)
+
+    return None
+
+async def read_frame(reader):
+    head = await reader.readexactly(2)
+    fin = head[0] & 0x80
+    opcode = head[0] & 0x0F
+    masked = head[1] & 0x80
+    length = head[1] & 0x7F
+
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+
+    if length > MAX_BODY:
+        raise HttpError(413)
+
+    mask = await reader.readexactly(4) if masked else None
+    data = await reader.readexactly(length)
+
+    if mask is not None:
+        mask = (mask * (length // 4 + 1))[:length]
+        n = int.from_bytes(data, "big") ^ int.from_bytes(mask, "big")
+        data = n.to_bytes(length, "big")
+
+    return fin, opcode, data
+
+def write_frame(writer, opcode, data):
+    length = len(data)
+    head = bytes([0x80 | opcode])
+
+    if length < 126:
+        head += bytes([length])
+    elif length < 1 << 16:
+        head += bytes([126]) + struct.pack("!H", length)
+    else:
+        head += bytes([127]) + struct.pack("!Q", length)
+
+    writer.write(head + data)
+
+def write_message(writer, data):
+    if not writer.is_closing():
+        write_frame(writer, OP_TEXT, json.dumps(data).encode("utf-8"))
+
+class AsyncServer:
+    def __init__(self, node):
+        self.node = node
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+
+        async with server:
+            await server.serve_forever()
+
+    def evaluate(self, s, output=None):
+        self.node.output = output
+
+        try:
+            return eval_source(self.node, s)
+        finally:
+            self.node.output = None
+
+    async def run_eval(self, s, output=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.evaluate, s,
+                                          output)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+
+                if request is None:
+                    break
+
+                if request.path == "/ws":
+                    await self.handle_ws(request, reader, writer)
+                    break
+
+                await self.route(request, writer)
+                await writer.drain()
+
+                if request.headers.get("connection", "").lower() == "close":
+                    break
+        except HttpError as e:
+            write_response(writer, e.status, b"")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception:
+            write_response(writer, 500, b"")
+        finally:
+            writer.close()
+
+    async def route(self, request, writer):
+        if request.path == "/eval":
+            if request.method != "POST":
+                raise HttpError(405)
+
+            s = request.form_param("input")
+
+            if s is None:
+                write_json(writer, error_resp(ServerError("No input given")))
+            else:
+                kind, value = await self.run_eval(s.strip())
+                write_json(writer, result_resp(kind, value))
+        elif request.path == "/batch":
+            if request.method != "POST":
+                raise HttpError(405)
+
+            await self.run_batch(request, writer)
+        elif request.path == "/completions":
+            name = request.query_param("name")
+
+            try:
+                matches = complete(self.node, name)
+                write_json(writer, values_resp(matches))
+            except ServerError as e:
+                write_json(writer, error_resp(e))
+        else:
+            path = static_path(request.path)
+
+            if path is None or not os.path.isfile(path):
+                raise HttpError(404)
+
+            with open(path, "rb") as f:
+                body = f.read()
+
+            content_type, _ = mimetypes.guess_type(path)
+            write_response(writer, 200, body, content_type)
+
+    async def run_batch(self, request, writer):
+        content_type = request.headers.get("content-type", "")
+
+        try:
+            batch = parse_batch(content_type, request.body)
+        except ServerError as e:
+            write_json(writer, error_resp(e))
+            return
+
+        stop_on_error = request.query_param("stop") in ["1", "true"]
+        results = eval_batch(self.node, batch, stop_on_error)
+        loop = asyncio.get_running_loop()
+
+        write_response(writer, 200, None, "application/json",
+                       ["Transfer-Encoding: chunked"])
+        sep = "["
+
+        while True:
+            result = await loop.run_in_executor(self.executor, next, results,
+                                                None)
+
+            if result is None:
+                break
+
+            write_chunk(writer, sep + json.dumps(result_resp(*result)))
+            sep = ","
+            await writer.drain()
+
+        write_chunk(writer, "[]" if sep == "[" else "]")
+        write_chunk(writer, "")
+
+    async def handle_ws(self, request, reader, writer):
+        key = request.headers.get("sec-websocket-key")
+
+        if request.headers.get("upgrade", "").lower() != "websocket" or \
+                key is None:
+            raise HttpError(400)
+
+        digest = hashlib.sha1((key + WS_GUID).encode()).digest()
+        accept = base64.b64encode(digest).decode()
+
+        write_response(writer, 101, headers=[
+            "Upgrade: websocket",
+            "Connection: Upgrade",
+            "Sec-WebSocket-Accept: " + accept,
+        ])
+
+        loop = asyncio.get_running_loop()
+
+        def output(s):
+            loop.call_soon_threadsafe(write_message, writer, output_resp(s))
+
+        message = b""
+
+        while True:
+            fin, opcode, data = await read_frame(reader)
+
+            if opcode == OP_CLOSE:
+                write_frame(writer, OP_CLOSE, data[:2])
+                break
+            elif opcode == OP_PING:
+                write_frame(writer, OP_PONG, data)
+                continue
+            elif opcode not in (OP_TEXT, OP_CONT):
+                continue
+
+            message += data
+
+            if not fin:
+                continue
+
+            try:
+                s = json.loads(message.decode("utf-8"))["input"]
+            except (ValueError, KeyError, TypeError):
+                s = None
+
+            message = b""
+
+            if not isinstance(s, str):
+                err = ServerError("No input given")
+                write_message(writer, error_resp(err))
+            else:
+                kind, value = await self.run_eval(s.strip(), output)
+                write_message(writer, result_resp(kind, value))
+
+            await writer.drain()
+
+if __name__ == "__main__":
+    server_main(sys.argv[1:])
@@ -0,0 +1,160 @@
+import io
+import random
+import sys
+import time
+
+from poly.common import *
+from poly.node import *
+from poly import reader, rply_reader
+
+def bench_main(args):
+    if len(args) == 0:
+        args = list(benchmarks.keys())
+
+    for name in args:
+        if name in benchmarks:
+            benchmarks[name]()
+        else:
+            print("Unrecognized benchmark {}".format(name))
+
+def timed(func, repeat=5):
+    best = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+def report(name, results):
+    base = results[0][1]
+
+    for label, elapsed in results:
+        speedup = base / elapsed
+        print("{:<24} {:<10} {:>10.4f}s {:>7.2f}x".format(name, label, elapsed,
+                                                     speedup))
+
+EVAL_WORKLOADS = [
+    ("foldr", "(poly/foldr + 0 l)"),
+    ("map", "(poly/map inc l)"),
+    (">>", "((poly/foldl >> id fs) 0)"),
+]
+
+LIST_LIBRARY = "tests/list.poly"
+
+def make_node():
+    node = Node("bench")
+    node.load_module("prelude.poly", "")
+    node.eval(node.read("(set! l (list {}))".format(
+        " ".join(str(i) for i in range(50)))))
+    node.eval(node.read("(set! fs (list {}))".format(" ".join(["inc"] * 20))))
+
+    return node
+
+def make_poly_node():
+    node = make_node()
+    node.load_module(LIST_LIBRARY)
+
+    return node
+
+def bench_eval():
+    node = make_poly_node()
+
+    for name, source in EVAL_WORKLOADS:
+        expr = node.read(source)
+        run = lambda: [node.eval(expr) for _ in range(20)]
+        report(name, [("walk", timed(run))])
+
+LIST_WORKLOADS = [
+    ("foldr", "(foldr + 0 l)"),
+    ("foldl", "(foldl + 0 l)"),
+    ("reverse", "(reverse l)"),
+    ("map", "(map inc l)"),
+    ("filter", "(filter (fn [x] (match x ([7 #f] [_ #t]))) l)"),
+    ("length", "(length l)"),
+    ("nth", "(nth l 42)"),
+    ("range", "(range 50)"),
+    ("apply", "(apply + l)"),
+    ("sort", "(sort (reverse l))"),
+]
+
+def bench_list():
+    native = make_node()
+    poly = make_poly_node()
+
+    for name, source in LIST_WORKLOADS:
+        native_expr = native.read(source)
+        poly_expr = poly.read(source.replace("(" + name, "(poly/" + name, 1))
+
+        expected = poly.eval(poly_expr)
+        actual = native.eval(native_expr)
+
+        if actual != expected:
+            print("{:<24} mismatch: {} != {}".format(name, actual, expected))
+            continue
+
+        results = [
+            ("poly", timed(lambda: [poly.eval(poly_expr)
+                                    for _ in range(20)])),
+            ("native", timed(lambda: [native.eval(native_expr)
+                                      for _ in range(20)])),
+        ]
+
+        report(name, results)
+
+def make_source(rows, seed=0):
+    rand = random.Random(seed)
+    lines = []
+
+    for i in range(rows):
+        tags = " ".join("#tag{}".format(rand.randrange(50)) for _ in range(8))
+        nums = " ".join(str(rand.random()) for _ in range(8))
+        line = '{{#id {} #name "row \\"{}\\"" #tags ({}) #vals [{}]}}'.format(
+            i, i, tags, nums)
+        lines.append("    " + line)
+
+    return "(\n" + "\n".join(lines) + ")\n"
+
+READER_CHUNK_SIZES = [777, 1000, 4096, 8192, 65536]
+
+def bench_reader():
+    source = make_source(10000)
+    size = len(source) / 1e6
+    expected = [reader.read_expr(source)]
+
+    for chunk_size in READER_CHUNK_SIZES:
+        forms = list(reader.read_exprs(io.StringIO(source), chunk_size))
+
+        if forms != expected:
+            print("{:<24} mismatch with chunk size {}".format("reader",
+                                                             chunk_size))
+
+    def read_rply():
+        rply_reader.read_expr(source)
+
+    def read_string():
+        reader.read_expr(source)
+
+    def read_stream():
+        list(reader.read_exprs(io.StringIO(source)))
+
+    results = [
+        ("rply", timed(read_rply, 1)),
+        ("string", timed(read_string, 3)),
+        ("stream", timed(read_stream, 3)),
+    ]
+
+    report("reader ({:.1f}MB)".format(size), results)
+
+benchmarks = {
+    "eval": bench_eval,
+    "list": bench_list,
+    "reader": bench_reader,
+}
+
+if __name__ == "__main__":
+    bench_main(sys.argv[1:])
@@ -1,14 +1,26 @@
 import re
-from itertools import chain, repeat
+from heapq import nsmallest
+from itertools import chain, islice, repeat
+from operator import itemgetter
+from weakref import WeakValueDictionary
 
 from poly.common import *
+from poly import hamt, pvec
+from poly.printer import show, to_string
+
+SAFE_IDENT_RE = re.compile(SAFE_IDENT)
+SAFE_SYMBOL_RE = re.compile(SAFE_SYMBOL[1:])
 
 class MatchError(PolyError):
     def __init__(self, lexpr, rexpr):
-        self.message = "Can't match {} with {}".format(lexpr, rexpr)
         self.lexpr = lexpr
         self.rexpr = rexpr
 
+    @property
+    def message(self):
+        return "Can't match {} with {}".format(show(self.lexpr),
+                                                show(self.rexpr))
+
 class UndefinedError(PolyError):
     def __init__(self, name):
         self.message = "Undefined var {}".format(name)
@@ -21,29 +33,60 @@ class UndefinedRefError(PolyError):
 
 class CantEvalError(PolyError):
     def __init__(self, expr):
-        self.message = "Can't evaluate {}".format(expr)
+        self.message = "Can't evaluate {}".format(show(expr))
         self.expr = expr
 
 class CantApplyError(PolyError):
     def __init__(self, expr):
-        self.message = "Can't apply {}".format(expr)
+        self.message = "Can't apply {}".format(show(expr))
         self.expr = expr
 
 class DuplicateKeyError(PolyError):
     def __init__(self, key):
-        self.message = "Duplicate key {}".format(key)
+        self.message = "Duplicate key {}".format(show(key))
+        self.key = key
+
+class MissingKeyError(PolyError):
+    def __init__(self, key):
+        self.message = "Missing key {}".format(show(key))
         self.key = key
 
 class ImproperListError(PolyError):
     def __init__(self, expr):
-        self.message = "Improper list {}".format(expr)
+        self.message = "Improper list {}".format(show(expr))
+
+class OutOfRangeError(PolyError):
+    def __init__(self, expr, index):
+        self.message = "Index {} out of range for {}".format(index,
+                                                               show(expr))
+        self.expr = expr
+        self.index = index
+
+class ArityError(PolyError):
+    def __init__(self, func, count):
+        self.message = "{} can't take {} arguments".format(show(func), count)
+        self.func = func
+        self.count = count
+
+class ZeroStepError(PolyError):
+    def __init__(self, func):
+        self.message = "{} can't take a step of 0".format(func)
+        self.func = func
 
 class InvalidTypeError(PolyError):
     def __init__(self, expr, typ):
-        self.message = "{} must be of type {}".format(expr, typ.__name__)
+        self.message = "{} must be of type {}".format(show(expr),
+                                                        typ.__name__)
         self.expr = expr
         self.type = typ
 
+class TailCall:
+    frames = None
+
+    def __init__(self, expr, env):
+        self.expr = expr
+        self.env = env
+
 class Expr:
     def eval(self, node, env):
         return self
@@ -57,19 +100,35 @@ class Expr:
         else:
             raise MatchError(self, other)
 
+    def matcher(self, slots):
+        def match(val, values):
+            return self == val
+
+        return match
+
+    def admits(self, cls):
+        return issubclass(cls, self.__class__)
+
     def lvars(self):
         return set()
 
+    def print_parts(self, limit):
+        return None
+
     def __repr__(self):
         return str(self)
 
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k[0] != "_"}
+
     def __eq__(self, other):
         return isinstance(other, self.__class__)
 
     def __hash__(self):
-        s = str(self)
-        h = hash(s)
-        return h
+        return hash(self.__class__)
+
+    def __lt__(self, other):
+        return self._ORDER < other._ORDER
 
 class Nil(Expr):
     _ORDER = 0
@@ -77,12 +136,34 @@ class Nil(Expr):
     def eval_list(self, node, env):
         return self
 
+    def eval_values(self, node, env):
+        return []
+
     def values(self):
         return iter([])
 
     def __str__(self):
         return "()"
 
+    def unify(self, other):
+        if isinstance(other, Vec) and len(other) == 0:
+            return Env()
+
+        return Expr.unify(self, other)
+
+    def matcher(self, slots):
+        def match(val, values):
+            return isinstance(val, Nil) or \
+                isinstance(val, Vec) and len(val) == 0
+
+        return match
+
+    def admits(self, cls):
+        return issubclass(cls, (Nil, Vec))
+
+    def __reduce__(self):
+        return "nil"
+
 nil = Nil()
 
 class Blank(Expr):
@@ -97,16 +178,42 @@ class Blank(Expr):
     def unify(self, other):
         return Env()
 
+    def matcher(self, slots):
+        def match(val, values):
+            return True
+
+        return match
+
+    def admits(self, cls):
+        return True
+
+    def __reduce__(self):
+        return "blank"
+
 blank = Blank()
 
 class Var(Expr):
     _ORDER = 2
+    _interned = WeakValueDictionary()
+
+    def __new__(cls, name):
+        var = cls._interned.get(name)
+
+        if var is None:
+            var = super().__new__(cls)
+            var.name = name
+            cls._interned[name] = var
+
+        return var
 
     def __init__(self, name):
         self.name = name
 
+    def __getnewargs__(self):
+        return (self.name,)
+
     def __str__(self):
-        safe = re.match(SAFE_IDENT, self.name)
+        safe = SAFE_IDENT_RE.fullmatch(self.name)
 
         if safe:
             return self.name
@@ -120,12 +227,23 @@ class Var(Expr):
         name = self.name
         return Env({name: other})
 
+    def matcher(self, slots):
+        slot = slots[self.name]
+
+        def match(val, values):
+            values[slot] = val
+            return True
+
+        return match
+
+    def admits(self, cls):
+        return True
+
     def lvars(self):
         return {self.name}
 
     def __eq__(self, other):
-        return isinstance(other, self.__class__) and \
-            self.name == other.name
+        return self is other
 
     def __hash__(self):
         return hash(self.name) + self._ORDER
@@ -151,8 +269,29 @@ class Num(Atom):
     def __str__(self):
         return str(self.value)
 
+SMALL_INT_MIN = -128
+SMALL_INT_MAX = 1024
+
 class Int(Num):
     _ORDER = 3
+    _small = {}
+
+    def __new__(cls, value):
+        if type(value) is not int or \
+                not SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+            return super().__new__(cls)
+
+        num = cls._small.get(value)
+
+        if num is None:
+            num = super().__new__(cls)
+            num.value = value
+            cls._small[value] = num
+
+        return num
+
+    def __getnewargs__(self):
+        return (self.value,)
 
 class Float(Num):
     _ORDER = 4
@@ -177,6 +316,26 @@ def unwrap_nums(exprs):
 
 class Symbol(Atom):
     _ORDER = 5
+    _interned = WeakValueDictionary()
+
+    def __new__(cls, value):
+        sym = cls._interned.get(value)
+
+        if sym is None:
+            sym = super().__new__(cls)
+            sym.value = value
+            cls._interned[value] = sym
+
+        return sym
+
+    def __getnewargs__(self):
+        return (self.value,)
+
+    def __eq__(self, other):
+        return self is other
+
+    def __hash__(self):
+        return hash(self.value) + self._ORDER
 
     def apply(self, node, env, expr):
         body = expr.eval_list(node, env)
@@ -184,8 +343,7 @@ class Symbol(Atom):
 
     def __str__(self):
         name = self.value
-        pat = SAFE_SYMBOL[1:]
-        safe = re.match(pat, name)
+        safe = SAFE_SYMBOL_RE.fullmatch(name)
 
         if safe:
             return "#" + name
@@ -193,8 +351,7 @@ class Symbol(Atom):
             return "#`{}`".format(name)
 
 def dquote_string(s):
-    py_expr = '"' + s + '"'
-    return eval(py_expr)
+    return s.encode("latin-1", "backslashreplace").decode("unicode_escape")
 
 def tick_string(s):
     return s.replace(r"\`", "`")
@@ -223,6 +380,12 @@ class Ref(Expr):
     def __str__(self):
         return "(ref {})".format(self.id)
 
+    def __eq__(self, other):
+        return isinstance(other, Ref) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id) + self._ORDER
+
 class Quote(Expr):
     _ORDER = 8
 
@@ -230,7 +393,10 @@ class Quote(Expr):
         self.expr = expr
 
     def __str__(self):
-        return "'" + str(self.expr)
+        return to_string(self)
+
+    def print_parts(self, limit):
+        return "'", [self.expr], ""
 
     def eval(self, node, env):
         return self.expr
@@ -247,88 +413,183 @@ class Quote(Expr):
         else:
             return self._ORDER < other._ORDER
 
+class Scope:
+    def __init__(self, names=()):
+        self.names = list(names)
+        self.slots = {name: i for i, name in enumerate(self.names)}
+        self.parent = None
+        self.children = {}
+        self.addresses = {}
+
+    def child(self, names):
+        names = tuple(names)
+
+        if names in self.children:
+            return self.children[names]
+
+        scope = Scope(names)
+        scope.parent = self
+        self.children[names] = scope
+
+        return scope
+
+    def add(self, name):
+        slot = len(self.names)
+        self.names.append(name)
+        self.slots[name] = slot
+        self.forget()
+
+        return slot
+
+    def forget(self):
+        scopes = [self]
+
+        while scopes:
+            scope = scopes.pop()
+            scope.addresses.clear()
+            scopes.extend(scope.children.values())
+
+    def resolve(self, name):
+        scope = self
+        depth = 0
+
+        while scope is not None:
+            if name in scope.slots:
+                address = depth, scope.slots[name]
+                break
+
+            scope = scope.parent
+            depth += 1
+        else:
+            address = None
+
+        self.addresses[name] = address
+        return address
+
 class Env(Expr):
     _ORDER = 9
+    index = None
 
-    def __init__(self, table=None, forwards=None):
+    def __init__(self, table=None):
         if table is None:
             table = {}
 
-        self.table = dict(table)
+        self.scope = Scope(table.keys())
+        self.values = list(table.values())
+        self.parent = None
 
-        if forwards is None:
-            forwards = {}
+    def __getitem__(self, name):
+        try:
+            address = self.scope.addresses[name]
+        except KeyError:
+            address = self.scope.resolve(name)
 
-        self.forwards = dict(forwards)
+        if address is not None:
+            depth, slot = address
+            env = self
 
-    def __getitem__(self, name):
-        if name in self.table:
-            return self.table[name]
+            while depth:
+                env = env.parent
+                depth -= 1
 
-        if name in self.forwards:
-            val = self.forwards[name][0]
+            val = env.values[slot]
 
             if val is not None:
-                self.table[name] = val
-                del self.forwards[name]
                 return val
 
         raise UndefinedError(name)
 
     def __setitem__(self, name, val):
-        if name in self.forwards:
-            del self.forwards[name]
+        slots = self.scope.slots
+
+        if name in slots:
+            self.values[slots[name]] = val
+        else:
+            self.scope.add(name)
+            self.values.append(val)
 
-        self.table[name] = val
+            if self.index is not None:
+                self.index.add(name)
+
+    def names(self):
+        return list(self.scope.names)
+
+    def items(self):
+        return zip(self.scope.names, self.values)
 
     def set_forward(self, name, val):
-        if name in self.forwards:
-            self.forwards[name][0] = val
+        slots = self.scope.slots
+
+        if name in slots:
+            self.values[slots[name]] = val
         else:
             raise UndefinedError(name)
 
-    def __add__(self, other):
-        env = self.clone()
-        env += other
+    def extend(self, names, values):
+        env = Env.__new__(Env)
+        env.scope = self.scope.child(names)
+        env.values = values
+        env.parent = self
+
         return env
 
+    def __add__(self, other):
+        return self.extend(other.scope.names, list(other.values))
+
     def __iadd__(self, other):
-        for name, val in other.table.items():
+        for name, val in other.items():
             self[name] = val
 
         return self
 
-    def clone(self):
-        return Env(self.table, self.forwards)
-
     def with_forwards(self, names):
-        env = self.clone()
-
-        for name in names:
-            env.forwards[name] = [None]
-
-        return env
+        values = [None] * len(names)
+        return self.extend(names, values)
 
     def __str__(self):
         return "(env ...)"
 
+    def __eq__(self, other):
+        return self is other
+
+    def __hash__(self):
+        return id(self)
+
 class Func(Expr):
     _ORDER = 10
 
+    def call(self, node, env, args):
+        return self.apply(node, env, make_list(args))
+
+    def __eq__(self, other):
+        return self is other
+
+    def __hash__(self):
+        return id(self)
+
 class Operative(Func):
     def __init__(self, pat, epat, body, env):
         self.pat = pat
         self.epat = epat
         self.body = body
-        self.env = env.clone()
+        self.names = tuple(sorted(pat.lvars() | epat.lvars()))
+        self.env = env
 
     def apply(self, node, env, expr):
-        pat_env = self.pat.unify(expr)
-        dyn_env = env.clone()
-        epat_env = self.epat.unify(dyn_env)
-        func_env = self.env + pat_env + epat_env
+        if node.profiler is not None:
+            return node.profiler.call(self, self.enter, node, env, expr)
+
+        return self.enter(node, env, expr)
+
+    def enter(self, node, env, expr):
+        names = self.names
+        values = [None] * len(names)
+
+        bind(self.pat, names, expr, values)
+        bind(self.epat, names, env, values)
+        func_env = self.env.extend(names, values)
 
-        return self.body.eval(node, func_env)
+        return node.tail(self.body, func_env)
 
     def __str__(self):
         return "(op {} {} ...)".format(str(self.pat),
@@ -339,30 +600,99 @@ class Wrapped(Func):
         self.func = func
 
     def apply(self, node, env, expr):
-        expr1 = expr.eval_list(node, env)
-        return self.func.apply(node, env, expr1)
+        args = expr.eval_values(node, env)
+        return self.func.call(node, env, args)
 
     def __str__(self):
         return "(wrap {})".format(str(self.func))
 
+    def __eq__(self, other):
+        return isinstance(other, Wrapped) and self.func == other.func
+
+    def __hash__(self):
+        return hash(self.func) + self._ORDER
+
+def call_values(node, env, func, vals):
+    if isinstance(func, Wrapped):
+        return func.func.call(node, env, vals)
+
+    return func.call(node, env, vals)
+
+prims = {}
+
+def find_prim(name):
+    return prims[name]
+
 class Prim(Func):
-    def __init__(self, func):
+    def __init__(self, func, name=None, types=None, rest=None):
         self.func = func
+        self.name = name
+        self.types = types
+        self.rest = rest
 
-    def apply(self, node, env, expr):
-        val = self.func(node, env, expr)
+        if types is not None:
+            self.checks = [(i, typ) for i, typ in enumerate(types)
+                           if typ is not Expr]
 
-        if val is None:
-            return Nil()
-        elif isinstance(val, Expr):
-            return val
+        if name is not None:
+            prims[name] = self
+
+    def __reduce__(self):
+        if self.name is None:
+            return super().__reduce__()
         else:
-            return NativeValue(val)
+            return find_prim, (self.name,)
+
+    def apply(self, node, env, expr):
+        if self.types is not None:
+            return self.call(node, env, list(expr.values()))
+
+        if node.profiler is not None:
+            val = node.profiler.call(self, self.func, node, env, expr)
+            return prim_result(val)
+
+        return prim_result(self.func(node, env, expr))
+
+    def call(self, node, env, args):
+        types = self.types
+
+        if types is None:
+            return self.apply(node, env, make_list(args))
+
+        if len(args) != len(types):
+            if self.rest is None or len(args) < len(types):
+                raise ArityError(self.name or self, len(args))
+
+            if self.rest is not Expr:
+                for arg in args[len(types):]:
+                    if not isinstance(arg, self.rest):
+                        raise InvalidTypeError(arg, self.rest)
+
+        for i, typ in self.checks:
+            if not isinstance(args[i], typ):
+                raise InvalidTypeError(args[i], typ)
+
+        if node.profiler is not None:
+            val = node.profiler.call(self, self.func, node, env, *args)
+            return prim_result(val)
+
+        return prim_result(self.func(node, env, *args))
 
     def __str__(self):
         return "(prim ...)"
 
+def prim_result(val):
+    if val is None:
+        return nil
+    elif isinstance(val, (Expr, TailCall)):
+        return val
+    else:
+        return NativeValue(val)
+
 class Coll(Expr):
+    def __str__(self):
+        return to_string(self)
+
     def __lt__(self, other):
         if isinstance(other, self.__class__):
             return False
@@ -376,32 +706,56 @@ class Cons(Coll):
         self.head = head
         self.tail = tail
 
-    def __str__(self):
+    def print_parts(self, limit):
+        return "(", self.print_items(), ")"
+
+    def print_items(self):
         expr = self
-        strs = []
 
         while True:
-            head_str = str(expr.head)
-            strs.append(head_str)
+            yield expr.head
+            tail = expr.tail
 
-            if expr.tail == nil:
-                break
-            elif isinstance(expr.tail, Cons):
-                expr = expr.tail
+            if isinstance(tail, Nil):
+                return
+            elif isinstance(tail, Cons):
+                expr = tail
             else:
-                tail_str = str(expr.tail)
-                strs += [".", tail_str]
-                break
-
-        return wrap("(", ")", strs)
+                yield "."
+                yield tail
+                return
 
     def unify(self, other):
         if isinstance(other, Cons):
-            return self.head.unify(other.head) + \
-                self.tail.unify(other.tail)
+            env = self.head.unify(other.head)
+            env += self.tail.unify(other.tail)
+            return env
+        elif isinstance(other, Vec) and len(other) > 0:
+            env = self.head.unify(other.nth(0))
+            env += self.tail.unify(other.rest())
+            return env
         else:
             raise MatchError(self, other)
 
+    def matcher(self, slots):
+        head = self.head.matcher(slots)
+        tail = self.tail.matcher(slots)
+
+        def match(val, values):
+            if isinstance(val, Cons):
+                return head(val.head, values) and tail(val.tail, values)
+            elif isinstance(val, Vec):
+                return len(val) > 0 and \
+                    head(val.nth(0), values) and \
+                    tail(val.rest(), values)
+
+            return False
+
+        return match
+
+    def admits(self, cls):
+        return issubclass(cls, (Cons, Vec))
+
     def values(self, *types):
         cons = self
         types = chain(types, repeat(Expr))
@@ -429,10 +783,13 @@ class Cons(Coll):
         return s
 
     def eval(self, node, env):
-        head = self.head.eval(node, env)
+        head = node.eval(self.head, env)
         return head.apply(node, env, self.tail)
 
     def eval_list(self, node, env):
+        return make_list(self.eval_values(node, env))
+
+    def eval_values(self, node, env):
         exprs = []
         cons = self
 
@@ -447,52 +804,119 @@ class Cons(Coll):
                 raise ImproperListError(self)
                 break
 
-        exprs1 = [expr.eval(node, env) for expr in exprs]
-        return make_list(exprs1)
+        return [node.eval(expr, env) for expr in exprs]
 
     def __eq__(self, other):
-        return isinstance(other, Cons) and \
-            self.head == other.head and \
-            self.tail == other.tail
+        if not isinstance(other, Cons) or hashes_differ(self, other):
+            return False
+
+        l1 = self
+        l2 = other
+
+        while isinstance(l1, Cons):
+            if l1 is l2:
+                return True
+            elif not isinstance(l2, Cons) or l1.head != l2.head:
+                return False
+
+            l1 = l1.tail
+            l2 = l2.tail
+
+        return l1 == l2
 
     def __hash__(self):
-        h = 0
-        cons = self
+        try:
+            return self._hash
+        except AttributeError:
+            pass
 
-        while True:
-            expr = cons.head
-            h = add_hash(h, expr)
+        cells = []
+        expr = self
 
-            if cons.tail == nil:
-                break
-            elif isinstance(cons.tail, Cons):
-                cons = cons.tail
-            else:
-                h = add_hash(h, cons)
-                break
+        while isinstance(expr, Cons) and "_hash" not in expr.__dict__:
+            cells.append(expr)
+            expr = expr.tail
+
+        h = hash(expr)
+
+        for cons in reversed(cells):
+            h = hash((cons.head, h))
+            cons._hash = h
 
         return h
 
-def add_hash(h, x):
-    return h * 31 + hash(x)
+def pattern(pat, names):
+    try:
+        matchers = pat._matchers
+    except AttributeError:
+        matchers = pat._matchers = {}
+
+    if names in matchers:
+        return matchers[names]
+
+    slots = {name: i for i, name in enumerate(names)}
+    matcher = pat.matcher(slots)
+    matchers[names] = matcher
+
+    return matcher
+
+def bind(pat, names, val, values):
+    if not pattern(pat, names)(val, values):
+        # unify reports the innermost mismatch
+        pat.unify(val)
+        raise MatchError(pat, val)
+
+def hashes_differ(expr1, expr2):
+    h1 = expr1.__dict__.get("_hash")
+    h2 = expr2.__dict__.get("_hash")
 
-def make_list(exprs, tail=None):
+    return h1 is not None and h2 is not None and h1 != h2
+
+_cons_table = WeakValueDictionary()
+
+def shared_cons(head, tail):
+    key = (id(head), id(tail))
+    cons = _cons_table.get(key)
+
+    if cons is None:
+        cons = Cons(head, tail)
+        _cons_table[key] = cons
+
+    return cons
+
+def make_list(exprs, tail=None, cons=Cons):
     if tail is None:
         tail = nil
 
-    cons = tail
+    l = tail
 
     for expr in reversed(exprs):
-        cons = Cons(expr, cons)
+        l = cons(expr, l)
 
-    return cons
+    return l
+
+class LazySeq(Cons):
+    def __init__(self, head, thunk):
+        self.head = head
+        self.thunk = thunk
+
+    @property
+    def tail(self):
+        try:
+            return self._tail
+        except AttributeError:
+            self._tail = self.thunk()
+            self.thunk = None
+            return self._tail
 
 class Map(Coll):
     _ORDER = 12
 
     def __init__(self, items=None):
         if items is None:
-            items = {}
+            items = hamt.empty
+        elif isinstance(items, dict):
+            items = hamt.Hamt.from_items(items.items())
 
         self.items = items
 
@@ -501,73 +925,186 @@ class Map(Coll):
 
     @classmethod
     def from_exprs(cls, exprs):
-        items = {}
-        keys = set()
+        items = hamt.empty
 
         l = len(exprs)
         for i in range(0, l, 2):
             k = exprs[i]
+            v = exprs[i + 1]
+            items1 = items.assoc(k, v)
 
-            if k in keys:
+            if len(items1) == len(items):
                 raise DuplicateKeyError(k)
-            else:
-                keys.add(k)
 
-            v = exprs[i + 1]
-            items[k] = v
+            items = items1
 
         return cls(items)
 
-    def __str__(self):
-        strs = []
+    def get(self, key):
+        val = self.items.get(key)
+
+        if val is None:
+            raise MissingKeyError(key)
+
+        return val
+
+    def assoc(self, key, val):
+        return Map(self.items.assoc(key, val))
+
+    def dissoc(self, key):
+        return Map(self.items.dissoc(key))
 
-        for k in self.keys():
-            v = self.items[k]
-            strs += [str(k), str(v)]
+    def merge(self, other):
+        return Map(self.items.update(other.items))
 
-        return wrap("{", "}", strs)
+    def print_parts(self, limit):
+        items = self.items.items()
+
+        if limit is None:
+            items = sorted(items, key=itemgetter(0))
+        else:
+            items = nsmallest(limit // 2 + 1, items, key=itemgetter(0))
+
+        return "{", chain.from_iterable(items), "}"
 
     def eval(self, node, env):
-        items = {}
+        items = hamt.empty
 
         for k, v in self.items.items():
-            k1 = k.eval(node, env)
-            v1 = v.eval(node, env)
+            k1 = node.eval(k, env)
+            v1 = node.eval(v, env)
 
-            items[k1] = v1
+            items = items.assoc(k1, v1)
 
         return Map(items)
 
     def __eq__(self, other):
-        keys1 = set(self.items.keys())
-        keys2 = set(other.items.keys())
+        if self is other:
+            return True
+        elif not isinstance(other, Map) or hashes_differ(self, other):
+            return False
+
+        return self.items == other.items
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(frozenset(self.items.items()))
+            return self._hash
+
+class Vec(Coll):
+    _ORDER = 13
+
+    def __init__(self, items=None, start=0):
+        if items is None:
+            items = pvec.empty
+
+        self.items = items
+        self.start = start
+
+    @classmethod
+    def from_exprs(cls, exprs):
+        return cls(pvec.PVec.from_list(list(exprs)))
+
+    def __len__(self):
+        return len(self.items) - self.start
+
+    def values(self):
+        return self.items.iter_from(self.start)
+
+    def nth(self, i):
+        if i < 0 or i >= len(self):
+            raise OutOfRangeError(self, i)
+
+        return self.items.nth(self.start + i)
+
+    def rest(self):
+        return Vec(self.items, self.start + 1)
+
+    def conj(self, *vals):
+        return Vec(self.items.extend(vals), self.start)
+
+    def slice(self, start, end=None):
+        l = len(self)
+
+        if end is None:
+            end = l
+
+        if start < 0 or start > l:
+            raise OutOfRangeError(self, start)
+        elif end < start or end > l:
+            raise OutOfRangeError(self, end)
+
+        if end == l:
+            return Vec(self.items, self.start + start)
 
-        if keys1 == keys2:
-            for k in keys1:
-                if self.items[k] != other.items[k]:
+        vals = islice(self.values(), start, end)
+        return Vec.from_exprs(vals)
+
+    def concat(self, other):
+        return Vec(self.items.extend(other.values()), self.start)
+
+    def print_parts(self, limit):
+        return "(", chain(["vec"], self.values()), ")"
+
+    def unify(self, other):
+        if not isinstance(other, Vec) or len(self) != len(other):
+            raise MatchError(self, other)
+
+        env = Env()
+
+        for pat, val in zip(self.values(), other.values()):
+            env += pat.unify(val)
+
+        return env
+
+    def matcher(self, slots):
+        matchers = [pat.matcher(slots) for pat in self.values()]
+
+        def match(val, values):
+            if not isinstance(val, Vec) or len(val) != len(matchers):
+                return False
+
+            for matcher, val1 in zip(matchers, val.values()):
+                if not matcher(val1, values):
                     return False
-        else:
-            return False
 
-        return True
+            return True
 
-    def __hash__(self, other):
-        h = 0
+        return match
 
-        for k in self.keys():
-            v = self.items[k]
+    def lvars(self):
+        s = set()
 
-            h = add_hash(h, k)
-            h = add_hash(h, v)
+        for val in self.values():
+            s.update(val.lvars())
 
-        return h
+        return s
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        elif not isinstance(other, Vec) or len(self) != len(other):
+            return False
+        elif hashes_differ(self, other):
+            return False
 
-def wrap(l, r, strs):
-    body = " ".join(strs)
-    return l + body + r
+        for val1, val2 in zip(self.values(), other.values()):
+            if val1 != val2:
+                return False
+
+        return True
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(tuple(self.values()))
+            return self._hash
 
 class NativeValue(Expr):
-    _ORDER = 13
+    _ORDER = 15
 
     def __init__(self, *args):
         self.data = args
@@ -575,3 +1112,9 @@ class NativeValue(Expr):
     def __str__(self):
         body = " ".join(map(repr, self.data))
         return "(native-value {})".format(body)
+
+    def __eq__(self, other):
+        return self is other
+
+    def __hash__(self):
+        return id(self)
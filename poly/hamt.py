@@ -0,0 +1,262 @@
+BITS = 5
+MASK = (1 << BITS) - 1
+
+def popcount(x):
+    return bin(x).count("1")
+
+class Collision:
+    def __init__(self, h, pairs):
+        self.h = h
+        self.pairs = pairs
+
+    def find(self, key):
+        for i, (k, v) in enumerate(self.pairs):
+            if k == key:
+                return i
+
+        return -1
+
+    def get(self, h, shift, key, default):
+        i = self.find(key)
+        return default if i < 0 else self.pairs[i][1]
+
+    def assoc(self, h, shift, key, val):
+        if h != self.h:
+            node = Node(0, []).insert(self.h, shift, self)
+            return node.assoc(h, shift, key, val)
+
+        i = self.find(key)
+        pairs = list(self.pairs)
+
+        if i < 0:
+            pairs.append((key, val))
+            return Collision(h, pairs), True
+
+        pairs[i] = (key, val)
+        return Collision(h, pairs), False
+
+    def dissoc(self, h, shift, key):
+        i = self.find(key)
+
+        if i < 0:
+            return self
+
+        pairs = self.pairs[:i] + self.pairs[i + 1:]
+
+        if len(pairs) == 1:
+            return pairs[0]
+
+        return Collision(h, pairs)
+
+    def pairs_iter(self):
+        return iter(self.pairs)
+
+class Node:
+    def __init__(self, bitmap, entries):
+        self.bitmap = bitmap
+        self.entries = entries
+
+    def index(self, bit):
+        return popcount(self.bitmap & (bit - 1))
+
+    def insert(self, h, shift, entry):
+        bit = 1 << ((h >> shift) & MASK)
+        i = self.index(bit)
+        entries = self.entries[:i] + [entry] + self.entries[i:]
+
+        return Node(self.bitmap | bit, entries)
+
+    def get(self, h, shift, key, default):
+        node = self
+
+        while True:
+            bit = 1 << ((h >> shift) & MASK)
+
+            if not node.bitmap & bit:
+                return default
+
+            entry = node.entries[node.index(bit)]
+
+            if isinstance(entry, tuple):
+                return entry[1] if entry[0] == key else default
+            elif isinstance(entry, Collision):
+                return entry.get(h, shift, key, default)
+
+            node = entry
+            shift += BITS
+
+    def assoc(self, h, shift, key, val):
+        bit = 1 << ((h >> shift) & MASK)
+        i = self.index(bit)
+
+        if not self.bitmap & bit:
+            return self.insert(h, shift, (key, val)), True
+
+        entry = self.entries[i]
+        added = False
+
+        if isinstance(entry, tuple):
+            k, v = entry
+
+            if k == key:
+                if v is val:
+                    return self, False
+
+                entry = (key, val)
+            else:
+                entry = merge(k, v, hash(k), key, val, h, shift + BITS)
+                added = True
+        else:
+            entry, added = entry.assoc(h, shift + BITS, key, val)
+
+        entries = list(self.entries)
+        entries[i] = entry
+
+        return Node(self.bitmap, entries), added
+
+    def dissoc(self, h, shift, key):
+        bit = 1 << ((h >> shift) & MASK)
+
+        if not self.bitmap & bit:
+            return self
+
+        i = self.index(bit)
+        entry = self.entries[i]
+
+        if isinstance(entry, tuple):
+            if entry[0] != key:
+                return self
+
+            entry = None
+        else:
+            entry1 = entry.dissoc(h, shift + BITS, key)
+
+            if entry1 is entry:
+                return self
+
+            entry = entry1
+
+        if entry is None:
+            if self.bitmap == bit:
+                return None
+
+            entries = self.entries[:i] + self.entries[i + 1:]
+            return Node(self.bitmap & ~bit, entries)
+
+        entries = list(self.entries)
+        entries[i] = entry
+
+        if len(entries) == 1 and isinstance(entry, tuple) and shift > 0:
+            return entry
+
+        return Node(self.bitmap, entries)
+
+    def pairs_iter(self):
+        stack = [iter(self.entries)]
+
+        while stack:
+            for entry in stack[-1]:
+                if isinstance(entry, tuple):
+                    yield entry
+                else:
+                    stack.append(iter(entry.pairs_iter()
+                                      if isinstance(entry, Collision)
+                                      else entry.entries))
+                    break
+            else:
+                stack.pop()
+
+def merge(k1, v1, h1, k2, v2, h2, shift):
+    if h1 == h2:
+        return Collision(h1, [(k1, v1), (k2, v2)])
+
+    node = Node(0, []).insert(h1, shift, (k1, v1))
+    node, _ = node.assoc(h2, shift, k2, v2)
+
+    return node
+
+empty_node = Node(0, [])
+missing = object()
+
+class Hamt:
+    def __init__(self, root=empty_node, size=0):
+        self.root = root
+        self.size = size
+
+    @classmethod
+    def from_items(cls, items):
+        h = empty
+
+        for k, v in items:
+            h = h.assoc(k, v)
+
+        return h
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return self.keys()
+
+    def __contains__(self, key):
+        return self.get(key, missing) is not missing
+
+    def __getitem__(self, key):
+        val = self.get(key, missing)
+
+        if val is missing:
+            raise KeyError(key)
+
+        return val
+
+    def get(self, key, default=None):
+        return self.root.get(hash(key), 0, key, default)
+
+    def assoc(self, key, val):
+        root, added = self.root.assoc(hash(key), 0, key, val)
+
+        if root is self.root:
+            return self
+
+        return Hamt(root, self.size + 1 if added else self.size)
+
+    def dissoc(self, key):
+        root = self.root.dissoc(hash(key), 0, key)
+
+        if root is self.root:
+            return self
+        elif root is None:
+            return empty
+
+        return Hamt(root, self.size - 1)
+
+    def update(self, other):
+        h = self
+
+        for k, v in other.items():
+            h = h.assoc(k, v)
+
+        return h
+
+    def items(self):
+        return self.root.pairs_iter()
+
+    def keys(self):
+        return (k for k, v in self.items())
+
+    def values(self):
+        return (v for k, v in self.items())
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        elif not isinstance(other, Hamt) or len(self) != len(other):
+            return False
+
+        for k, v in self.items():
+            if other.get(k, missing) != v:
+                return False
+
+        return True
+
+empty = Hamt()
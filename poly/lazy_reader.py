@@ -0,0 +1,214 @@
+import mmap
+import os
+import re
+from array import array
+from bisect import bisect_left
+
+from poly.common import *
+from poly.expr import *
+from poly.reader import ReaderError, tokens, token_pattern, atom_readers, \
+    OPENERS, CLOSERS
+
+token_re = re.compile(token_pattern.encode())
+
+bracket_re = re.compile("|".join([
+    tokens["STRING"],
+    tokens["RAWIDENT"],
+    tokens["LINECOMMENT"],
+    r"[\(\)\[\]\{\}]",
+]).encode())
+
+BRACKETS = {
+    ord("("): "(", ord("["): "(", ord("{"): "{",
+    ord(")"): ")", ord("]"): ")", ord("}"): "}",
+}
+
+ERROR_CONTEXT = 80
+
+class MappedFile:
+    def __init__(self, path):
+        self.path = path
+
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size > 0:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.data = b""
+
+        self.opens = array("q")
+        self.closes = array("q")
+        self.index()
+
+    def error(self, start, end):
+        end = min(end, start + ERROR_CONTEXT)
+        s = self.data[start:end].decode("utf-8", "replace")
+        return ReaderError(s)
+
+    def index(self):
+        data = self.data
+        opens = self.opens
+        closes = self.closes
+        stack = []
+
+        for match in bracket_re.finditer(data):
+            start = match.start()
+            kind = BRACKETS.get(data[start])
+
+            if kind is None:
+                continue
+
+            if kind == "(" or kind == "{":
+                stack.append((len(opens), kind))
+                opens.append(start)
+                closes.append(-1)
+                continue
+
+            if not stack:
+                raise self.error(0, start + 1)
+
+            i, open_kind = stack.pop()
+
+            if (open_kind == "(") != (kind == ")"):
+                raise self.error(opens[i], start + 1)
+
+            closes[i] = start
+
+        if stack:
+            i, _ = stack[0]
+            raise self.error(opens[i], len(data))
+
+    def close_of(self, pos):
+        i = bisect_left(self.opens, pos)
+        return self.closes[i]
+
+    def token(self, pos):
+        match = token_re.match(self.data, pos)
+        name = match.lastgroup
+
+        if name is None:
+            if match.end() < len(self.data):
+                raise self.error(pos, match.end() + 1)
+
+            return None, match.end(), match.end()
+
+        return name, match.start(name), match.end()
+
+    def skip(self, pos):
+        name, start, end = self.token(pos)
+
+        if name in OPENERS:
+            return self.close_of(start) + 1
+        elif name == "SQUOTE":
+            return self.skip(end)
+        elif name is None or name in CLOSERS or name == "DOT":
+            raise self.error(pos, end)
+        else:
+            return end
+
+    def read(self, pos):
+        name, start, end = self.token(pos)
+
+        if name in OPENERS:
+            close = self.close_of(start)
+
+            if OPENERS[name] == "{":
+                return self.read_map(end, close), close + 1
+            else:
+                return self.read_list(end, close), close + 1
+        elif name == "SQUOTE":
+            expr, end = self.read(end)
+            return Quote(expr), end
+        elif name is None or name in CLOSERS or name == "DOT":
+            raise self.error(pos, end)
+        else:
+            s = self.data[start:end].decode("utf-8")
+            return atom_readers[name](s), end
+
+    def read_list(self, pos, close):
+        name, start, end = self.token(pos)
+
+        if start == close:
+            return nil
+        else:
+            return LazyCons(self, start, close)
+
+    def read_map(self, pos, close):
+        exprs = []
+
+        while True:
+            name, start, end = self.token(pos)
+
+            if start == close:
+                break
+
+            expr, pos = self.read(start)
+            exprs.append(expr)
+
+        if len(exprs) % 2 != 0:
+            raise self.error(pos, close + 1)
+
+        return Map.from_exprs(exprs)
+
+    def forms(self):
+        pos = 0
+
+        while True:
+            name, start, end = self.token(pos)
+
+            if name is None:
+                return
+
+            expr, pos = self.read(start)
+            yield expr
+
+class LazyCons(Cons):
+    def __init__(self, file, pos, close):
+        self.file = file
+        self.pos = pos
+        self.close = close
+
+    @property
+    def head(self):
+        try:
+            return self._head
+        except AttributeError:
+            self._head, _ = self.file.read(self.pos)
+            return self._head
+
+    @property
+    def tail(self):
+        try:
+            return self._tail
+        except AttributeError:
+            self._tail = self.read_tail()
+            return self._tail
+
+    def __reduce__(self):
+        return Cons, (self.head, self.tail)
+
+    def read_tail(self):
+        file = self.file
+        pos = file.skip(self.pos)
+        name, start, end = file.token(pos)
+
+        if start == self.close:
+            return nil
+        elif name != "DOT":
+            return LazyCons(file, start, self.close)
+
+        expr, pos = file.read(end)
+        name, start, end = file.token(pos)
+
+        if start != self.close:
+            raise file.error(self.pos, self.close + 1)
+
+        return expr
+
+def read_mapped(path):
+    forms = MappedFile(path).forms()
+    expr = next(forms, None)
+
+    if expr is None or next(forms, None) is not None:
+        raise ReaderError(path)
+
+    return expr
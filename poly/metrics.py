@@ -0,0 +1,195 @@
+import os
+import resource
+import sys
+import threading
+from bisect import bisect_left
+from collections import Counter
+from time import perf_counter
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+PHASES = {
+    "read": "Time spent reading each form",
+    "eval": "Time spent evaluating each form",
+}
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+def timed(metrics, phase, f, *args):
+    if metrics is None:
+        return f(*args)
+
+    start = perf_counter()
+
+    try:
+        return f(*args)
+    finally:
+        metrics.observe(phase, perf_counter() - start)
+
+def count_error(metrics, error):
+    if metrics is not None:
+        metrics.error(error)
+
+def format_labels(labels):
+    if not labels:
+        return ""
+
+    pairs = ['{}="{}"'.format(k, str(v).replace("\\", r"\\")
+                               .replace('"', r"\"").replace("\n", r"\n"))
+             for k, v in labels.items()]
+
+    return "{" + ",".join(pairs) + "}"
+
+def sample(name, labels, value):
+    return "{}{} {}".format(name, format_labels(labels), value)
+
+def header(name, typ, help):
+    return ["# HELP {} {}".format(name, help),
+            "# TYPE {} {}".format(name, typ)]
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def merge(self, other):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+
+        self.total += other.total
+
+    def samples(self, name, labels=None):
+        labels = labels or {}
+        lines = []
+        n = 0
+
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            n += count
+            lines.append(sample(name + "_bucket", dict(labels, le=bound), n))
+
+        lines.append(sample(name + "_sum", labels, self.total))
+        lines.append(sample(name + "_count", labels, n))
+
+        return lines
+
+class EvalMetrics:
+    def __init__(self):
+        self.phases = {phase: Histogram() for phase in PHASES}
+        self.errors = Counter()
+        self.bindings = 0
+        self.refs = 0
+        self.rss = 0
+
+    def observe(self, phase, seconds):
+        self.phases[phase].observe(seconds)
+
+    def error(self, error):
+        self.errors[error.__class__.__name__] += 1
+
+    def merge(self, other):
+        for phase, hist in other.phases.items():
+            self.phases[phase].merge(hist)
+
+        self.errors.update(other.errors)
+
+    def snapshot(self, node):
+        self.bindings = len(node.env.values)
+        self.refs = len(node.refs)
+        self.rss = rss_bytes()
+
+        return self
+
+class ServerMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.latency = {}
+        self.errors = Counter()
+
+    def observe(self, endpoint, seconds):
+        with self.lock:
+            self.requests[endpoint] += 1
+
+            if endpoint not in self.latency:
+                self.latency[endpoint] = Histogram()
+
+            self.latency[endpoint].observe(seconds)
+
+    def error(self, error):
+        with self.lock:
+            self.errors[error.__class__.__name__] += 1
+
+    def render(self, workers, retired=None):
+        evals = EvalMetrics()
+
+        if retired is not None:
+            evals.merge(retired)
+
+        for _, metrics in workers:
+            if metrics is not None:
+                evals.merge(metrics)
+
+        with self.lock:
+            requests = dict(self.requests)
+            latency = dict(self.latency)
+            errors = self.errors + evals.errors
+
+        lines = header("poly_requests_total", "counter",
+                       "Requests handled, by endpoint")
+
+        for endpoint, n in sorted(requests.items()):
+            lines.append(sample("poly_requests_total",
+                                {"endpoint": endpoint}, n))
+
+        lines += header("poly_request_duration_seconds", "histogram",
+                        "Request latency, by endpoint")
+
+        for endpoint, hist in sorted(latency.items()):
+            lines += hist.samples("poly_request_duration_seconds",
+                                  {"endpoint": endpoint})
+
+        for phase, hist in sorted(evals.phases.items()):
+            name = "poly_{}_duration_seconds".format(phase)
+            lines += header(name, "histogram", PHASES[phase])
+            lines += hist.samples(name)
+
+        lines += header("poly_errors_total", "counter",
+                        "Errors, by error type")
+
+        for typ, n in sorted(errors.items()):
+            lines.append(sample("poly_errors_total", {"type": typ}, n))
+
+        gauges = [
+            ("poly_env_bindings", "bindings", "Bindings in a worker's env"),
+            ("poly_refs", "refs", "Live refs in a worker"),
+            ("poly_worker_resident_memory_bytes", "rss",
+             "Resident memory of a worker process"),
+        ]
+
+        for name, attr, help in gauges:
+            lines += header(name, "gauge", help)
+
+            for i, metrics in workers:
+                if metrics is not None:
+                    lines.append(sample(name, {"worker": i},
+                                        getattr(metrics, attr)))
+
+        lines += header("process_resident_memory_bytes", "gauge",
+                        "Resident memory of the server process")
+        lines.append(sample("process_resident_memory_bytes", None,
+                            rss_bytes()))
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,24 @@
+from bisect import bisect_left, insort
+from heapq import nsmallest
+
+class NameIndex:
+    def __init__(self, names=()):
+        self.names = sorted(names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name):
+        insort(self.names, name)
+
+    def prefixed(self, prefix):
+        names = self.names
+        i = bisect_left(names, prefix)
+
+        while i < len(names) and names[i].startswith(prefix):
+            yield names[i]
+            i += 1
+
+    def complete(self, prefix, limit):
+        rank = lambda name: (len(name), name)
+        return nsmallest(limit, self.prefixed(prefix), key=rank)
@@ -1,26 +1,88 @@
+import hashlib
+import os
+import pickle
+import sys
+
 from poly.common import *
 from poly.expr import *
 from poly.prim import prim_table
 from poly.reader import read_expr
+from poly.lazy_reader import read_mapped
+from poly.names import NameIndex
+from poly.printer import show
+from poly.profiler import Profiler
 
 class ModuleError(PolyError):
     def __init__(self, error):
         self.message = "Module couldn't be loaded: {}".format(error.message)
         self.error = error
 
+class OutOfFuelError(PolyError):
+    def __init__(self, budget):
+        self.message = "Evaluation ran out of fuel after {} steps".format(budget)
+        self.budget = budget
+
+class CancelledError(PolyError):
+    def __init__(self):
+        self.message = "Evaluation was cancelled"
+
+class ImageError(PolyError):
+    def __init__(self, path, error):
+        self.message = "Image {} couldn't be loaded: {}".format(path, error)
+        self.path = path
+        self.error = error
+
+IMAGE_VERSION = 1
+
+def source_key(paths):
+    package = os.path.dirname(os.path.abspath(__file__))
+    sources = sorted(os.path.join(package, name)
+                     for name in os.listdir(package) if name.endswith(".py"))
+
+    h = hashlib.sha256()
+    h.update(repr((IMAGE_VERSION, sys.version_info[:2])).encode())
+
+    for path in sources + list(paths):
+        h.update(path.encode())
+
+        with open(path, "rb") as f:
+            h.update(f.read())
+
+    return h.hexdigest()
+
 class Node:
-    def __init__(self, name):
+    def __init__(self, name, tail_calls=True, budget=None):
         self.name = name
+        self.tail_calls = tail_calls
+        self.budget = budget
         self.env = Env(prim_table)
+        self.env.index = NameIndex(self.env.names())
+
+        self.output = None
+        self.profiler = None
+
+        self.steps = 0
+        self.limit = float("inf")
+        self.running = False
+        self.cancelled = False
 
         self.refs = {}
         self.next_ref_id = 0
 
     def names(self):
-        return self.env.table.keys()
+        return self.env.names()
 
-    def read(self, s):
-        return read_expr(s)
+    def complete(self, prefix, limit):
+        return self.env.index.complete(prefix, limit)
+
+    def write(self, s):
+        if self.output is None:
+            print(s)
+        else:
+            self.output(s)
+
+    def read(self, s, hashcons=False):
+        return read_expr(s, hashcons)
 
     def make_ref(self):
         ref_id = self.next_ref_id
@@ -41,15 +103,91 @@ class Node:
         else:
             raise UndefinedRefError(ref_id)
 
-    def eval(self, expr):
-        return expr.eval(self, self.env)
+    def eval(self, expr, env=None):
+        if env is None:
+            env = self.env
+
+        if not self.running:
+            return self.run(self.eval, expr, env)
+
+        return self.force(self.step(expr, env))
+
+    def run(self, f, *args):
+        if self.running:
+            return f(*args)
+
+        self.running = True
+        self.cancelled = False
+
+        if self.budget is None:
+            self.limit = float("inf")
+        else:
+            self.limit = self.steps + self.budget
+
+        try:
+            return f(*args)
+        finally:
+            self.running = False
+            self.limit = float("inf")
+
+    def show(self, val):
+        return self.run(show, val)
+
+    def cancel(self):
+        if self.running:
+            self.cancelled = True
+            self.limit = -1
+
+    def out_of_fuel(self):
+        if self.cancelled:
+            raise CancelledError()
+        else:
+            raise OutOfFuelError(self.budget)
+
+    def force(self, val):
+        while isinstance(val, TailCall):
+            frames = val.frames
+            val = self.step(val.expr, val.env)
+
+            if frames is not None:
+                self.profiler.leave(frames)
+
+        return val
+
+    def step(self, expr, env):
+        self.steps += 1
+
+        if self.steps > self.limit:
+            self.out_of_fuel()
+
+        return expr.eval(self, env)
 
-    def load_module(self, path, prefix=None):
-        with open(path, "r") as f:
-            s = f.read()
+    def profile(self, expr, env=None):
+        profiler = Profiler(self.env)
+        val = profiler.run(self, expr, env)
 
+        return val, profiler
+
+    def bind(self, name, val):
+        self.env[name] = val
+
+        if self.profiler is not None:
+            self.profiler.bind(name, val)
+
+    def tail(self, expr, env):
+        if self.tail_calls:
+            return TailCall(expr, env)
+        else:
+            return self.eval(expr, env)
+
+    def load_module(self, path, prefix=None, lazy=False, hashcons=False):
         try:
-            expr = self.read(s)
+            if lazy:
+                expr = read_mapped(path)
+            else:
+                with open(path, "r") as f:
+                    expr = self.read(f.read(), hashcons)
+
             module = self.eval(expr)
         except PolyError as e:
             raise ModuleError(e)
@@ -61,7 +199,59 @@ class Node:
 
         for name, func in defs.items():
             full_name = prefix + name
-            self.env[full_name] = func
+            self.bind(full_name, func)
+
+    def save_image(self, path, key):
+        state = (IMAGE_VERSION, key, self.env, self.refs, self.next_ref_id)
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def load_image(self, path, key):
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            raise ImageError(path, e)
+
+        version, image_key, env, refs, next_ref_id = state
+
+        if version != IMAGE_VERSION or image_key != key:
+            return False
+
+        self.env = env
+        self.refs = refs
+        self.next_ref_id = next_ref_id
+
+        return True
+
+    def boot(self, modules, image=None):
+        if image is not None:
+            key = source_key([path for path, _ in modules])
+
+            try:
+                if self.load_image(image, key):
+                    return
+            except ImageError:
+                pass
+
+        for path, prefix in modules:
+            self.load_module(path, prefix)
+
+        if image is not None:
+            try:
+                self.save_image(image, key)
+            except (OSError, pickle.PicklingError, AttributeError, TypeError):
+                pass
 
     def exit(self):
         return
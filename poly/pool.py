@@ -0,0 +1,154 @@
+import multiprocessing
+import threading
+import time
+import zlib
+from itertools import count
+
+from poly.common import *
+from poly.node import *
+from poly.api import COMPLETION_LIMIT, eval_batch, profile_source
+from poly.metrics import EvalMetrics
+
+class EvalTimeoutError(PolyError):
+    def __init__(self, timeout):
+        self.message = "Evaluation timed out after {}s".format(timeout)
+        self.timeout = timeout
+
+class WorkerError(PolyError):
+    def __init__(self):
+        self.message = "Worker process died"
+
+context = multiprocessing.get_context("spawn")
+
+def worker_main(conn, modules, image):
+    node = Node("worker")
+    node.boot(modules, image)
+    metrics = EvalMetrics()
+
+    while True:
+        try:
+            kind, args = conn.recv()
+        except EOFError:
+            return
+
+        if kind == "profile":
+            conn.send(profile_source(node, *args))
+        elif kind == "complete":
+            conn.send(node.complete(*args))
+        else:
+            for result in eval_batch(node, *args, metrics=metrics):
+                conn.send(result)
+
+        conn.send(metrics.snapshot(node))
+
+class Worker:
+    def __init__(self, modules, image):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=worker_main,
+                                       args=(child, modules, image))
+        self.process.daemon = True
+        self.process.start()
+        child.close()
+
+        self.metrics = None
+
+    def results(self, kind, args, timeout):
+        deadline = time.monotonic() + timeout
+
+        try:
+            self.conn.send((kind, args))
+
+            while True:
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0 or not self.conn.poll(remaining):
+                    raise EvalTimeoutError(timeout)
+
+                result = self.conn.recv()
+
+                if isinstance(result, EvalMetrics):
+                    self.metrics = result
+                    return
+
+                yield result
+        except (EOFError, OSError):
+            raise WorkerError()
+
+    def kill(self):
+        self.conn.close()
+        self.process.terminate()
+        self.process.join()
+
+def drain(results):
+    try:
+        for _ in results:
+            pass
+    except PolyError:
+        return False
+
+    return True
+
+class Pool:
+    def __init__(self, size, modules, image=None, timeout=10.0):
+        self.modules = modules
+        self.image = image
+        self.timeout = timeout
+        self.workers = [Worker(modules, image) for _ in range(size)]
+        self.locks = [threading.Lock() for _ in range(size)]
+        self.counter = count()
+        self.retired = EvalMetrics()
+
+    def slot(self, session):
+        if session is None:
+            i = next(self.counter)
+        else:
+            i = zlib.crc32(session.encode())
+
+        return i % len(self.workers)
+
+    def eval(self, s, session=None):
+        (result,) = self.eval_batch([s], session)
+        return result
+
+    def eval_batch(self, batch, session=None, stop_on_error=False):
+        return self.request("batch", (batch, stop_on_error), session)
+
+    def profile(self, s, session=None):
+        (result,) = self.request("profile", (s,), session)
+        return result
+
+    def complete(self, prefix, session=None):
+        (result,) = self.request("complete", (prefix, COMPLETION_LIMIT),
+                                 session)
+        return result
+
+    def request(self, kind, args, session):
+        i = self.slot(session)
+
+        with self.locks[i]:
+            worker = self.workers[i]
+            results = worker.results(kind, args, self.timeout)
+            done = False
+
+            try:
+                for result in results:
+                    yield result
+
+                done = True
+            except GeneratorExit:
+                done = drain(results)
+                raise
+            finally:
+                if not done:
+                    if worker.metrics is not None:
+                        self.retired.merge(worker.metrics)
+
+                    worker.kill()
+                    self.workers[i] = Worker(self.modules, self.image)
+
+    def metrics(self):
+        return list(enumerate(worker.metrics for worker in self.workers))
+
+    def close(self):
+        for worker in self.workers:
+            worker.kill()
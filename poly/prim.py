@@ -2,32 +2,40 @@ import operator
 from collections import OrderedDict
 
 from poly.expr import *
+from poly.array import *
+from poly.printer import to_string
 
 prim_table = {}
 
 def prim(name):
     def dec(func):
-        prim_table[name] = Prim(func)
+        prim_table[name] = Prim(func, name)
         return func
 
     return dec
 
-def wprim(name):
+def wprim(name, *types, rest=None):
+    if not types and rest is None:
+        types = None
+
     def dec(func):
-        prim_table[name] = Wrapped(Prim(func))
+        prim_table[name] = Wrapped(Prim(func, name, types, rest))
         return func
 
     return dec
 
 def math(name):
     def dec(func):
-        def wrapped(node, env, expr):
-            exprs = list(expr.values())
+        def wrapped(node, env, *exprs):
+            for e in exprs:
+                if isinstance(e, Array):
+                    return array_math(name, exprs)
+
             vals, wrapper = unwrap_nums(exprs)
             res = func(vals, wrapper)
             return res
 
-        prim_table[name] = Wrapped(Prim(wrapped))
+        prim_table[name] = Wrapped(Prim(wrapped, name, (), Expr))
         return wrapped
 
     return dec
@@ -51,63 +59,60 @@ def _module(node, env, expr):
 
     for name in names:
         expr = defs[name]
-        val = expr.eval(node, menv)
+        val = node.eval(expr, menv)
 
         defs[name] = val
         menv.set_forward(name, val)
 
     return NativeValue(module_name, defs)
 
-@wprim("hash")
-def _hash(node, env, expr):
-    (val,) = expr.values()
+@wprim("hash", Expr)
+def _hash(node, env, val):
     h = hash(val)
     return Int(h)
 
-@wprim("cons")
-def _cons(node, env, expr):
-    head, tail = expr.values()
+@wprim("cons", Expr, Expr)
+def _cons(node, env, head, tail):
     return Cons(head, tail)
 
-@wprim("join")
-def _join(node, env, expr):
-    l1, l2 = expr.values(Cons, Cons)
+@wprim("join", Cons, Cons)
+def _join(node, env, l1, l2):
     values = list(l1.values()) + list(l2.values())
     return make_list(values)
 
-@wprim("fmt")
-def _fmt(node, env, expr):
-    s0 = expr.head
-    l = expr.tail
+@wprim("fmt", Expr, rest=Expr)
+def _fmt(node, env, s0, *vals):
     fs = s0.value
-    s1 = fs.format(*l.values())
+    s1 = fs.format(*vals)
     return String(s1)
 
-@wprim("eval")
-def _eval(node, env, expr):
-    expr0, env0 = expr.values(Expr, Env)
-    return expr0.eval(node, env0)
+@wprim("eval", Expr, Env)
+def _eval(node, env, expr0, env0):
+    return node.tail(expr0, env0)
 
 @prim("op")
 def _op(node, env, expr):
     pat, epat, body = expr.values()
     return Operative(pat, epat, body, env)
 
-@wprim("op*")
-def _op__star(node, env, expr):
-    pat, epat, body, env0 = expr.values(Expr, Expr, Expr, Env)
+@wprim("op*", Expr, Expr, Expr, Env)
+def _op__star(node, env, pat, epat, body, env0):
     return Operative(pat, epat, body, env0)
 
-@wprim("wrap")
-def _wrap(node, env, expr):
-    (func,) = expr.values(Func)
-    return Wrapped(expr.head)
+@wprim("wrap", Func)
+def _wrap(node, env, func):
+    return Wrapped(func)
 
-@prim("let")
-def _let(node, env, expr):
-    env = env.clone()
-    assocs, body = expr.values(Cons, Expr)
+def pattern_names(pat):
+    return tuple(sorted(pat.lvars()))
+
+def let_bindings(expr):
+    try:
+        return expr._let
+    except AttributeError:
+        pass
 
+    assocs, body = expr.values(Cons, Expr)
     bindings = []
 
     while assocs != nil:
@@ -115,79 +120,427 @@ def _let(node, env, expr):
         assocs = assocs.tail
 
         pat = pair.head
-        expr = pair.tail.head
-        bindings.append((pat, expr))
+        expr1 = pair.tail.head
+        bindings.append((pat, pattern_names(pat), expr1))
+
+    expr._let = bindings, body
+    return expr._let
+
+@prim("let")
+def _let(node, env, expr):
+    bindings, body = let_bindings(expr)
+
+    for pat, names, expr in bindings:
+        val = node.eval(expr, env)
+        values = [None] * len(names)
+        bind(pat, names, val, values)
+
+        if names:
+            env = env.extend(names, values)
+
+    return node.tail(body, env)
 
-    for pat, expr in bindings:
-        val = expr.eval(node, env)
-        penv = pat.unify(val)
-        env += penv
+class Cases:
+    def __init__(self, cases):
+        self.cases = []
+        self.dispatch = {}
 
-    return body.eval(node, env)
+        while cases != nil:
+            pair = cases.head
+            cases = cases.tail
+
+            pat = pair.head
+            expr = pair.tail.head
+            names = pattern_names(pat)
+            self.cases.append((pat, names, pattern(pat, names), expr))
+
+    def candidates(self, cls):
+        if cls not in self.dispatch:
+            self.dispatch[cls] = [case for case in self.cases
+                                  if case[0].admits(cls)]
+
+        return self.dispatch[cls]
+
+def match_cases(expr):
+    try:
+        return expr._match
+    except AttributeError:
+        pass
+
+    head, cases = expr.values(Expr, Cons)
+    expr._match = head, Cases(cases)
+
+    return expr._match
 
 @prim("match")
 def _match(node, env, expr):
-    head, cases = expr.values(Expr, Cons)
-    val = head.eval(node, env)
+    head, cases = match_cases(expr)
+    val = node.eval(head, env)
 
-    pairs = []
+    for pat, names, matcher, expr in cases.candidates(val.__class__):
+        values = [None] * len(names)
 
-    while cases != nil:
-        pair = cases.head
-        cases = cases.tail
+        if matcher(val, values):
+            if names:
+                env = env.extend(names, values)
 
-        pat = pair.head
-        expr = pair.tail.head
-        pairs.append((pat, expr))
-
-    for pat, expr in pairs:
-        try:
-            penv = pat.unify(val)
-        except MatchError:
-            continue
-
-        fenv = env + penv
-        return expr.eval(node, fenv)
-
-@wprim("show")
-def _show(node, env, expr):
-    (val,) = expr.values()
-    s = str(val)
-    return String(s)
-
-@wprim("print-string")
-def _print_string(node, env, expr):
-    (val,) = expr.values()
-
-    if isinstance(val, String):
-        print(val.value)
+            return node.tail(expr, env)
+
+def seq_values(l):
+    if isinstance(l, (Nil, Cons, Vec)):
+        return list(l.values())
+    else:
+        raise InvalidTypeError(l, Cons)
+
+false = Symbol("f")
+
+@wprim("list/foldr", Func, Expr, Expr)
+def _list__foldr(node, env, f, a, l):
+    for h in reversed(seq_values(l)):
+        a = node.force(call_values(node, env, f, [h, a]))
+
+    return a
+
+@wprim("list/foldl", Func, Expr, Expr)
+def _list__foldl(node, env, f, a, l):
+    for h in seq_values(l):
+        a = node.force(call_values(node, env, f, [a, h]))
+
+    return a
+
+@wprim("list/map", Func, Expr)
+def _list__map(node, env, f, l):
+    vals = [node.force(call_values(node, env, f, [h]))
+            for h in seq_values(l)]
+    return make_list(vals)
+
+@wprim("list/filter", Func, Expr)
+def _list__filter(node, env, f, l):
+    vals = [h for h in seq_values(l)
+            if node.force(call_values(node, env, f, [h])) != false]
+    return make_list(vals)
+
+@wprim("list/reverse", Expr)
+def _list__reverse(node, env, l):
+    vals = seq_values(l)
+    vals.reverse()
+    return make_list(vals)
+
+@wprim("list/apply", Func, Expr)
+def _list__apply(node, env, f, l):
+    return call_values(node, env, f, seq_values(l))
+
+@wprim("list/length", Expr)
+def _list__length(node, env, l):
+    return Int(len(seq_values(l)))
+
+@wprim("list/nth", Expr, Int)
+def _list__nth(node, env, l, i):
+    vals = seq_values(l)
+
+    if i.value < 0 or i.value >= len(vals):
+        raise OutOfRangeError(l, i.value)
+
+    return vals[i.value]
+
+@wprim("list/sort", Expr)
+def _list__sort(node, env, l):
+    return make_list(sorted(seq_values(l)))
+
+def int_range(name, args):
+    if len(args) > 3:
+        raise ArityError(name, len(args))
+
+    if len(args) == 3 and args[2].value == 0:
+        raise ZeroStepError(name)
+
+    return range(*[arg.value for arg in args])
+
+@wprim("list/range", Int, rest=Int)
+def _list__range(node, env, *args):
+    vals = int_range("list/range", args)
+    return make_list([Int(i) for i in vals])
+
+def seq_head(seq):
+    if isinstance(seq, Cons):
+        return seq.head
+    elif isinstance(seq, Vec) and len(seq) > 0:
+        return seq.nth(0)
+    elif isinstance(seq, (Nil, Vec)):
+        return None
+    else:
+        raise InvalidTypeError(seq, Cons)
+
+def seq_tail(seq):
+    if isinstance(seq, Cons):
+        return seq.tail
+    else:
+        return seq.rest()
+
+def lazy_range(r, i):
+    if i >= len(r):
+        return nil
+
+    return LazySeq(Int(r[i]), lambda: lazy_range(r, i + 1))
+
+def lazy_map(node, env, f, seq):
+    h = seq_head(seq)
+
+    if h is None:
+        return nil
+
+    h1 = node.force(call_values(node, env, f, [h]))
+
+    return LazySeq(h1, lambda: node.run(lazy_map, node, env, f,
+                                        seq_tail(seq)))
+
+def lazy_filter(node, env, f, seq):
+    while True:
+        h = seq_head(seq)
+
+        if h is None:
+            return nil
+
+        if node.force(call_values(node, env, f, [h])) != false:
+            return LazySeq(h, lambda: node.run(lazy_filter, node, env, f,
+                                               seq_tail(seq)))
+
+        seq = seq_tail(seq)
+
+def lazy_take(n, seq):
+    h = seq_head(seq) if n > 0 else None
+
+    if h is None:
+        return nil
+    elif n == 1:
+        return LazySeq(h, lambda: nil)
+
+    return LazySeq(h, lambda: lazy_take(n - 1, seq_tail(seq)))
+
+@wprim("lazy/cons*", Expr, Func)
+def _lazy__cons__star(node, env, h, thunk):
+    def tail():
+        return node.force(call_values(node, env, thunk, []))
+
+    return LazySeq(h, lambda: node.run(tail))
+
+@wprim("lazy/range", Int, rest=Int)
+def _lazy__range(node, env, *args):
+    r = int_range("lazy/range", args)
+    return lazy_range(r, 0)
+
+@wprim("lazy/map", Func, Expr)
+def _lazy__map(node, env, f, seq):
+    return lazy_map(node, env, f, seq)
+
+@wprim("lazy/filter", Func, Expr)
+def _lazy__filter(node, env, f, seq):
+    return lazy_filter(node, env, f, seq)
+
+@wprim("lazy/take", Int, Expr)
+def _lazy__take(node, env, n, seq):
+    return lazy_take(n.value, seq)
+
+@wprim("lazy/to-list", Expr)
+def _lazy__to_list(node, env, seq):
+    vals = []
+    h = seq_head(seq)
+
+    while h is not None:
+        vals.append(h)
+        seq = seq_tail(seq)
+        h = seq_head(seq)
+
+    return make_list(vals)
+
+MEMO_SIZE = 1024
+
+class Memo:
+    def __init__(self, func, size):
+        self.func = func
+        self.size = size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, node, env, *args):
+        cache = self.cache
+
+        if args in cache:
+            self.hits += 1
+            cache.move_to_end(args)
+            return cache[args]
+
+        self.misses += 1
+        val = node.force(call_values(node, env, self.func, list(args)))
+        cache[args] = val
+
+        if len(cache) > self.size:
+            cache.popitem(last=False)
+
+        return val
+
+    def stats(self):
+        return Map.from_exprs([
+            Symbol("hits"), Int(self.hits),
+            Symbol("misses"), Int(self.misses),
+            Symbol("size"), Int(len(self.cache)),
+            Symbol("max-size"), Int(self.size),
+        ])
+
+def find_memo(func):
+    if isinstance(func, Wrapped) and isinstance(func.func, Prim) and \
+            isinstance(func.func.func, Memo):
+        return func.func.func
     else:
-        raise InvalidTypeError(val, String)
+        raise InvalidTypeError(func, Memo)
+
+@wprim("memo", Wrapped, rest=Int)
+def _memo(node, env, func, *size):
+    if len(size) > 1:
+        raise ArityError("memo", len(size) + 1)
+
+    size = size[0].value if size else MEMO_SIZE
+    memo = Memo(func, size)
+
+    return Wrapped(Prim(memo, None, (), Expr))
+
+@wprim("memo/stats", Func)
+def _memo__stats(node, env, func):
+    return find_memo(func).stats()
+
+@wprim("memo/clear!", Func)
+def _memo__clear(node, env, func):
+    find_memo(func).cache.clear()
+
+@wprim("show", Expr)
+def _show(node, env, val):
+    return String(to_string(val))
 
-@wprim("set*")
-def _set__star(node, env, expr):
-    head, expr0 = expr.values()
+@wprim("print-string", String)
+def _print_string(node, env, val):
+    node.write(val.value)
+
+@wprim("set*", Expr, Expr)
+def _set__star(node, env, head, expr0):
     name = head.name
-    node.env[name] = expr0
+    node.bind(name, expr0)
 
-@wprim("ref/new")
-def _ref__new(node, env, expr):
-    (expr1,) = expr.values()
+@wprim("ref/new", Expr)
+def _ref__new(node, env, expr1):
     ref = node.make_ref()
     node.set_ref(ref.id, expr1)
 
     return ref
 
-@wprim("ref/get")
-def _ref__get(node, env, expr):
-    (ref,) = expr.values(Ref)
+@wprim("ref/get", Ref)
+def _ref__get(node, env, ref):
     return node.get_ref(ref.id)
 
-@wprim("ref/set!")
-def _ref__set(node, env, expr):
-    ref, expr1 = expr.values(Ref, Expr)
+@wprim("ref/set!", Ref, Expr)
+def _ref__set(node, env, ref, expr1):
     node.set_ref(ref.id, expr1)
 
+@wprim("map/get", Map, Expr, rest=Expr)
+def _map__get(node, env, m, key, *default):
+    if len(default) > 1:
+        raise ArityError("map/get", 2 + len(default))
+
+    if default:
+        return m.items.get(key, default[0])
+
+    return m.get(key)
+
+@wprim("map/assoc", Map, Expr, Expr)
+def _map__assoc(node, env, m, key, val):
+    return m.assoc(key, val)
+
+@wprim("map/dissoc", Map, Expr)
+def _map__dissoc(node, env, m, key):
+    return m.dissoc(key)
+
+@wprim("map/merge", rest=Map)
+def _map__merge(node, env, *maps):
+    m = Map()
+
+    for m1 in maps:
+        m = m1 if len(m.items) == 0 else m.merge(m1)
+
+    return m
+
+@wprim("map/keys", Map)
+def _map__keys(node, env, m):
+    return make_list(m.keys())
+
+@wprim("vec", rest=Expr)
+def _vec(node, env, *vals):
+    return Vec.from_exprs(vals)
+
+@wprim("vec/length", Vec)
+def _vec__length(node, env, v):
+    return Int(len(v))
+
+@wprim("vec/nth", Vec, Int)
+def _vec__nth(node, env, v, i):
+    return v.nth(i.value)
+
+@wprim("vec/conj", Vec, rest=Expr)
+def _vec__conj(node, env, v, *vals):
+    return v.conj(*vals)
+
+@wprim("vec/slice", Vec, Int, rest=Int)
+def _vec__slice(node, env, v, start, *end):
+    if len(end) > 1:
+        raise ArityError("vec/slice", 2 + len(end))
+
+    return v.slice(start.value, *[i.value for i in end])
+
+@wprim("vec/concat", rest=Vec)
+def _vec__concat(node, env, *vecs):
+    v = Vec()
+
+    for v1 in vecs:
+        v = v1 if len(v) == 0 else v.concat(v1)
+
+    return v
+
+@wprim("array", rest=Expr)
+def _array(node, env, *vals):
+    return Array.from_exprs(vals)
+
+@wprim("array/from-list", Expr)
+def _array__from_list(node, env, l):
+    return Array.from_exprs(seq_values(l))
+
+@wprim("array/to-list", Array)
+def _array__to_list(node, env, a):
+    return make_list(list(a.values()))
+
+@wprim("array/length", Array)
+def _array__length(node, env, a):
+    return Int(len(a))
+
+@wprim("array/nth", Array, Int)
+def _array__nth(node, env, a, i):
+    return a.nth(i.value)
+
+@wprim("array/slice", Array, Int, rest=Int)
+def _array__slice(node, env, a, start, *end):
+    if len(end) > 1:
+        raise ArityError("array/slice", 2 + len(end))
+
+    return a.slice(start.value, *[i.value for i in end])
+
+def reduction(name):
+    @wprim("array/" + name, Array)
+    def _reduce(node, env, a):
+        return a.reduce(name)
+
+reduction("sum")
+reduction("mean")
+reduction("min")
+reduction("max")
+
 @math("+")
 def _add(vals, wrapper):
     x = 0
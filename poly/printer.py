@@ -0,0 +1,87 @@
+from io import StringIO
+
+CHUNK_SIZE = 8192
+ELLIPSIS = "..."
+
+MAX_DEPTH = 100
+MAX_LENGTH = 1000
+
+class Frame:
+    __slots__ = ["items", "close", "sep", "count"]
+
+    def __init__(self, items, close):
+        self.items = iter(items)
+        self.close = close
+        self.sep = ""
+        self.count = 0
+
+def pieces(expr, max_depth=None, max_length=None):
+    stack = []
+    item = expr
+
+    while True:
+        if isinstance(item, str):
+            yield item
+        else:
+            parts = item.print_parts(max_length)
+
+            if parts is None:
+                yield str(item)
+            elif max_depth is not None and len(stack) >= max_depth:
+                yield ELLIPSIS
+            else:
+                open, items, close = parts
+                yield open
+                stack.append(Frame(items, close))
+
+        while stack:
+            frame = stack[-1]
+            item = next(frame.items, None)
+
+            if item is None:
+                stack.pop()
+                yield frame.close
+                continue
+
+            yield frame.sep
+            frame.sep = " "
+
+            if isinstance(item, str):
+                break
+            elif max_length is not None and frame.count >= max_length:
+                stack.pop()
+                yield ELLIPSIS + frame.close
+                continue
+
+            frame.count += 1
+            break
+        else:
+            return
+
+def chunks(expr, max_depth=None, max_length=None, size=CHUNK_SIZE):
+    buf = []
+    n = 0
+
+    for s in pieces(expr, max_depth, max_length):
+        buf.append(s)
+        n += len(s)
+
+        if n >= size:
+            yield "".join(buf)
+            buf = []
+            n = 0
+
+    if buf:
+        yield "".join(buf)
+
+def print_expr(expr, out, max_depth=None, max_length=None):
+    for chunk in chunks(expr, max_depth, max_length):
+        out.write(chunk)
+
+def to_string(expr, max_depth=None, max_length=None):
+    out = StringIO()
+    print_expr(expr, out, max_depth, max_length)
+    return out.getvalue()
+
+def show(expr):
+    return to_string(expr, MAX_DEPTH, MAX_LENGTH)
@@ -0,0 +1,165 @@
+import sys
+from collections import Counter
+from time import perf_counter
+
+from poly.common import *
+from poly.expr import *
+
+ANONYMOUS = "<anonymous>"
+
+class ProfileDepthError(PolyError):
+    def __init__(self):
+        self.message = "Profiled calls nested too deeply"
+
+class Stats:
+    __slots__ = ["calls", "total", "own", "allocs"]
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.own = 0.0
+        self.allocs = 0
+
+class Frame:
+    __slots__ = ["name", "start", "blocks", "children", "child_allocs"]
+
+    def __init__(self, name):
+        self.name = name
+        self.start = perf_counter()
+        self.blocks = sys.getallocatedblocks()
+        self.children = 0.0
+        self.child_allocs = 0
+
+class Profiler:
+    def __init__(self, env=None):
+        self.names = {}
+        self.stats = {}
+        self.stacks = Counter()
+        self.stack = []
+        self.active = Counter()
+
+        if env is not None:
+            for name, val in env.items():
+                self.bind(name, val)
+
+    def bind(self, name, val):
+        while isinstance(val, Wrapped):
+            self.names[id(val)] = name
+            val = val.func
+
+        if isinstance(val, Func):
+            self.names[id(val)] = name
+
+    def name_of(self, func):
+        name = self.names.get(id(func))
+
+        if name is None and isinstance(func, Prim):
+            name = func.name
+
+        return name or ANONYMOUS
+
+    def call(self, func, f, node, *args):
+        name = self.name_of(func)
+        self.active[name] += 1
+
+        frame = Frame(name)
+        self.stack.append(frame)
+
+        try:
+            val = f(node, *args)
+        except BaseException:
+            self.exit(frame)
+            raise
+
+        if isinstance(val, TailCall):
+            val.frames = (val.frames or ()) + (frame,)
+        else:
+            self.exit(frame)
+
+        return val
+
+    def leave(self, frames):
+        for frame in frames:
+            self.exit(frame)
+
+    def exit(self, frame):
+        end = perf_counter()
+        blocks = sys.getallocatedblocks()
+
+        elapsed = end - frame.start
+        allocs = blocks - frame.blocks
+
+        i = len(self.stack) - 1
+
+        while self.stack[i] is not frame:
+            i -= 1
+
+        del self.stack[i]
+        self.active[frame.name] -= 1
+
+        if i < len(self.stack):
+            pending = self.stack[i]
+            elapsed -= end - pending.start
+            allocs -= blocks - pending.blocks
+
+        self.record(frame, i, elapsed, allocs)
+
+    def record(self, frame, depth, elapsed, allocs):
+        stats = self.stats.get(frame.name)
+
+        if stats is None:
+            stats = self.stats[frame.name] = Stats()
+
+        own = max(elapsed - frame.children, 0.0)
+
+        stats.calls += 1
+        stats.own += own
+        stats.allocs += max(allocs - frame.child_allocs, 0)
+
+        if self.active[frame.name] == 0:
+            stats.total += elapsed
+
+        path = tuple(f.name for f in self.stack[:depth]) + (frame.name,)
+        self.stacks[path] += own
+
+        if depth > 0:
+            parent = self.stack[depth - 1]
+            parent.children += elapsed
+            parent.child_allocs += allocs
+
+    def run(self, node, expr, env=None):
+        node.profiler = self
+
+        try:
+            return node.eval(expr, env)
+        except RecursionError:
+            raise ProfileDepthError()
+        finally:
+            node.profiler = None
+            self.stack = []
+            self.active.clear()
+
+    def rows(self):
+        return sorted(self.stats.items(), key=lambda item: -item[1].own)
+
+    def report(self, limit=None):
+        lines = ["{:>8} {:>12} {:>12} {:>10}  {}".format(
+            "calls", "total (ms)", "own (ms)", "allocs", "name")]
+
+        for name, stats in self.rows()[:limit]:
+            lines.append("{:>8} {:>12.3f} {:>12.3f} {:>10}  {}".format(
+                stats.calls, stats.total * 1000, stats.own * 1000,
+                stats.allocs, name))
+
+        return "\n".join(lines)
+
+    def collapsed(self):
+        lines = []
+
+        for path, own in sorted(self.stacks.items()):
+            micros = int(own * 1e6)
+
+            if micros > 0:
+                lines.append("{} {}".format(";".join(path), micros))
+
+        return "\n".join(lines) + "\n" if lines else ""
@@ -0,0 +1,110 @@
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+
+def new_path(level, node):
+    while level > 0:
+        node = (node,)
+        level -= BITS
+
+    return node
+
+def push_tail(size, level, parent, tail):
+    i = ((size - 1) >> level) & MASK
+
+    if level == BITS:
+        node = tail
+    elif i < len(parent):
+        node = push_tail(size, level - BITS, parent[i], tail)
+    else:
+        node = new_path(level - BITS, tail)
+
+    return parent[:i] + (node,) + parent[i + 1:]
+
+class PVec:
+    def __init__(self, size=0, shift=BITS, root=(), tail=()):
+        self.size = size
+        self.shift = shift
+        self.root = root
+        self.tail = tail
+
+    @classmethod
+    def from_list(cls, vals):
+        size = len(vals)
+        offset = tail_offset(size)
+        nodes = [tuple(vals[i:i + WIDTH]) for i in range(0, offset, WIDTH)]
+        shift = BITS
+
+        while len(nodes) > WIDTH:
+            nodes = [tuple(nodes[i:i + WIDTH])
+                     for i in range(0, len(nodes), WIDTH)]
+            shift += BITS
+
+        return cls(size, shift, tuple(nodes), tuple(vals[offset:]))
+
+    def __len__(self):
+        return self.size
+
+    def leaf(self, i):
+        if i >= tail_offset(self.size):
+            return self.tail
+
+        node = self.root
+        level = self.shift
+
+        while level > 0:
+            node = node[(i >> level) & MASK]
+            level -= BITS
+
+        return node
+
+    def nth(self, i):
+        if i < 0 or i >= self.size:
+            raise IndexError(i)
+
+        return self.leaf(i)[i & MASK]
+
+    def conj(self, val):
+        size = self.size
+
+        if size - tail_offset(size) < WIDTH:
+            return PVec(size + 1, self.shift, self.root, self.tail + (val,))
+
+        shift = self.shift
+
+        if (size >> BITS) > (1 << shift):
+            root = (self.root, new_path(shift, self.tail))
+            shift += BITS
+        else:
+            root = push_tail(size, shift, self.root, self.tail)
+
+        return PVec(size + 1, shift, root, (val,))
+
+    def extend(self, vals):
+        v = self
+
+        for val in vals:
+            v = v.conj(val)
+
+        return v
+
+    def iter_from(self, start):
+        i = start
+
+        while i < self.size:
+            leaf = self.leaf(i)
+            j = i & MASK
+
+            yield from leaf[j:]
+            i += len(leaf) - j
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+def tail_offset(size):
+    if size < WIDTH:
+        return 0
+
+    return ((size - 1) >> BITS) << BITS
+
+empty = PVec()
@@ -1,13 +1,8 @@
-from logging import captureWarnings
-
-from rply import LexerGenerator, ParserGenerator
-from rply.errors import LexingError, ParsingError
+import re
 
 from poly.common import *
 from poly.expr import *
 
-captureWarnings(True)
-
 class ReaderError(PolyError):
     def __init__(self, input, tokens=False):
         self.message = "Can't read '{}'".format(input)
@@ -38,176 +33,203 @@ tokens = {
     "RAWSYMBOL": r"#`(\\`|[^`])+`",
 }
 
-lg = LexerGenerator()
-
-for rule, regex in tokens.items():
-    lg.add(rule, regex)
+IGNORE = r"[\s,]+"
 
-lg.ignore(r"[\s,]+")
+token_pattern = "(?:{}|{})*(?:{})?".format(
+    IGNORE, tokens["LINECOMMENT"],
+    "|".join("(?P<{}>{})".format(name, regex)
+             for name, regex in tokens.items()
+             if name != "LINECOMMENT"))
+token_re = re.compile(token_pattern)
 
-token_names = list(tokens.keys())
-pg = ParserGenerator(token_names, cache_id="poly_reader")
+# longest lookahead any token rule needs to decide where it ends ("1." + digit)
+LOOKAHEAD = 2
 
-@pg.production("main : expr")
-def main(p):
-    return p[0]
+# tokens that backtrack to an escaped delimiter when the real one isn't read yet
+ESCAPED = {"STRING", "RAWIDENT", "RAWSYMBOL"}
 
-@pg.production("exprs : expr")
-def exprs_one(p):
-    return [p[0]]
+OPENERS = {"LPAREN": "(", "LSQUARE": "(", "LBRACE": "{"}
+CLOSERS = {"RPAREN": "(", "RSQUARE": "(", "RBRACE": "{"}
 
-@pg.production("exprs : expr exprs")
-def exprs_many(p):
-    return [p[0]] + p[1]
+class Lexer:
+    def __init__(self, source, chunk_size=65536):
+        if isinstance(source, str):
+            chunks = iter([source])
+        elif hasattr(source, "read"):
+            chunks = iter(lambda: source.read(chunk_size), "")
+        else:
+            chunks = iter(source)
 
-# @pg.production("expr : expr COMMENT expr")
-# def expr_then_comment(p):
-#     return p[0]
+        self.chunks = chunks
+        self.buf = ""
+        self.pos = 0
+        self.mark = 0
+        self.done = False
 
-# @pg.production("expr : COMMENT expr expr")
-# def comment_then_expr(p):
-#     return p[2]
+    def fill(self):
+        if self.done:
+            return False
 
-@pg.production("expr : _comment")
-def exprs_comment(p):
-    return p[0]
+        for chunk in self.chunks:
+            if chunk:
+                self.buf = self.buf[self.mark:] + chunk
+                self.pos -= self.mark
+                self.mark = 0
+                return True
 
-@pg.production("_comment : expr LINECOMMENT")
-def expr_then_linecomment(p):
-    return p[0]
+        self.done = True
+        return False
 
-@pg.production("_comment : _comment LINECOMMENT")
-def comment_then_linecomment(p):
-    return p[0]
+    def text(self):
+        return self.buf[self.mark:self.pos]
 
-@pg.production("expr : UNDER")
-def expr_blank(p):
-    return blank
+    def start_form(self):
+        self.mark = self.pos
 
-@pg.production("expr : IDENT")
-def expr_var(p):
-    name = p[0].getstr()
-    return Var(name)
+    def __iter__(self):
+        return self
 
-@pg.production("expr : RAWIDENT")
-def expr_raw_ident(p):
-    body = p[0].getstr()[1:-1]
-    name = tick_string(body)
-    return Var(name)
+    def __next__(self):
+        while True:
+            match = token_re.match(self.buf, self.pos)
+            name = match.lastgroup
+            end = match.end()
 
-@pg.production("expr : SQUOTE expr")
-def expr_quote(p):
-    return Quote(p[1])
+            if name is None or len(self.buf) - end < LOOKAHEAD or \
+                    name in ESCAPED and self.buf[end - 2] == "\\":
+                if self.fill():
+                    continue
 
-@pg.production("expr : atom")
-def expr_atom(p):
-    return p[0]
+            if name is None:
+                self.pos = end
 
-@pg.production("expr : coll")
-def expr_coll(p):
-    return p[0]
-
-@pg.production("atom : NUMBER")
-def atom_number(p):
-    s = p[0].getstr()
-
-    if s[0:2] == "0x":
-        rest = s[2:]
-        n = int(rest, 16)
-        return Int(n)
+                if end < len(self.buf):
+                    raise ReaderError(self.text() + self.buf[end])
 
-    return read_number(s)
-
-def read_number(s):
-    try:
-        n = int(s)
-        expr = Int(n)
-    except ValueError:
-        f = float(s)
-        expr = Float(f)
-
-    return expr
+                raise StopIteration
 
-@pg.production("atom : SYMBOL")
-def atom_symbol(p):
-    name = p[0].getstr()[1:]
-    return Symbol(name)
-
-@pg.production("atom : RAWSYMBOL")
-def atom_raw_symbol(p):
-    body = p[0].getstr()[2:-1]
-    name = tick_string(body)
-    return Symbol(name)
-
-@pg.production("atom : STRING")
-def atom_string(p):
-    body = p[0].getstr()[1:-1]
-    s = dquote_string(body)
-    return String(s)
-
-@pg.production("lbrack : LPAREN")
-def lbrack_paren(p):
-    return p[0]
-
-@pg.production("lbrack : LSQUARE")
-def lbrack_square(p):
-    return p[0]
-
-@pg.production("rbrack : RPAREN")
-def rbrack_paren(p):
-    return p[0]
-
-@pg.production("rbrack : RSQUARE")
-def rbrack_square(p):
-    return p[0]
-
-@pg.production("coll : lbrack rbrack")
-def coll_nil(p):
-    return nil
-
-@pg.production("coll : lbrack exprs rbrack")
-def coll_list(p):
-    exprs = p[1]
-    return make_list(exprs, nil)
-
-@pg.production("coll : lbrack exprs DOT expr rbrack")
-def coll_dotted_list(p):
-    exprs = p[1]
-    tail = p[3]
-    return make_list(exprs, tail)
-
-@pg.production("coll : LBRACE RBRACE")
-def coll_empty_map(p):
-    return Map()
-
-@pg.production("coll : LBRACE exprs RBRACE")
-def coll_map(p):
-    return Map.from_exprs(p[1])
-
-lexer = lg.build()
-parser = pg.build()
+            self.pos = end
+            return name, match.group(name)
 
 def get_tokens(s):
-    stream = lexer.lex(s)
     tokens = []
 
-    while True:
-        token = stream.next()
-
-        if token is None:
-            break
-
-        tokens.append((token.name, token.value))
+    try:
+        for token in Lexer(s):
+            tokens.append(token)
+    except ReaderError:
+        pass
 
     return tokens
 
-def read_expr(s):
+def read_string(s):
     try:
-        token_stream = lexer.lex(s)
-        expr = parser.parse(token_stream)
-    except LexingError:
+        return String(dquote_string(s[1:-1]))
+    except UnicodeDecodeError:
         raise ReaderError(s)
-    except ParsingError:
+
+def read_number(s):
+    if s[0:2] == "0x":
+        return Int(int(s[2:], 16))
+    elif "." in s:
+        return Float(float(s))
+    else:
+        return Int(int(s))
+
+atom_readers = {
+    "UNDER": lambda s: blank,
+    "IDENT": Var,
+    "RAWIDENT": lambda s: Var(tick_string(s[1:-1])),
+    "NUMBER": read_number,
+    "SYMBOL": lambda s: Symbol(s[1:]),
+    "RAWSYMBOL": lambda s: Symbol(tick_string(s[2:-1])),
+    "STRING": read_string,
+}
+
+class Frame:
+    def __init__(self, kind):
+        self.kind = kind
+        self.exprs = []
+        self.dotted = False
+        self.tail = None
+
+def read_exprs(source, chunk_size=65536, hashcons=False):
+    lexer = Lexer(source, chunk_size)
+    cons = shared_cons if hashcons else Cons
+    stack = []
+
+    def fail():
+        raise ReaderError(lexer.text(), tokens=True)
+
+    for name, s in lexer:
+        if name in OPENERS:
+            stack.append(Frame(OPENERS[name]))
+            continue
+        elif name == "SQUOTE":
+            stack.append(Frame("'"))
+            continue
+        elif name == "DOT":
+            if not stack:
+                fail()
+
+            frame = stack[-1]
+
+            if frame.kind != "(" or frame.dotted or not frame.exprs:
+                fail()
+
+            frame.dotted = True
+            continue
+        elif name in CLOSERS:
+            if not stack:
+                fail()
+
+            frame = stack.pop()
+
+            if frame.kind != CLOSERS[name]:
+                fail()
+
+            if frame.kind == "{":
+                if len(frame.exprs) % 2 != 0:
+                    fail()
+
+                expr = Map.from_exprs(frame.exprs)
+            elif frame.dotted:
+                if frame.tail is None:
+                    fail()
+
+                expr = make_list(frame.exprs, frame.tail, cons)
+            else:
+                expr = make_list(frame.exprs, cons=cons)
+        else:
+            expr = atom_readers[name](s)
+
+        while stack and stack[-1].kind == "'":
+            stack.pop()
+            expr = Quote(expr)
+
+        if not stack:
+            yield expr
+            lexer.start_form()
+        elif stack[-1].tail is not None:
+            fail()
+        elif stack[-1].dotted:
+            stack[-1].tail = expr
+        else:
+            stack[-1].exprs.append(expr)
+
+    if stack:
+        fail()
+
+def read_expr(s, hashcons=False):
+    exprs = read_exprs(s, hashcons=hashcons)
+
+    try:
+        expr = next(exprs, None)
+        extra = next(exprs, None)
+    except ReaderError as e:
+        raise ReaderError(s, tokens=bool(e.tokens))
+
+    if expr is None or extra is not None:
         raise ReaderError(s, tokens=True)
 
     return expr
@@ -5,11 +5,18 @@ from clint.textui import puts, indent, colored
 
 from poly.common import *
 from poly.node import *
+from poly.printer import MAX_DEPTH, MAX_LENGTH, chunks
 
 def repl_main(args):
     repl = Repl("repl")
     repl.run()
 
+PRELUDE = [("prelude.poly", "")]
+PRELUDE_IMAGE = "prelude.image"
+
+PROFILE_PATH = "profile.folded"
+PROFILE_LIMIT = 20
+
 class UndefinedCommandError(PolyError):
     def __init__(self, command):
         self.message = "Undefined command '{}'".format(command)
@@ -29,7 +36,7 @@ class Repl:
         self.out_prompt = out_prompt
 
         try:
-            self.node.load_module("prelude.poly", "")
+            self.node.boot(PRELUDE, PRELUDE_IMAGE)
         except ModuleError as e:
             self.print_error(e)
 
@@ -42,7 +49,7 @@ class Repl:
             if is_command:
                 try:
                     exit = self.handle_command(s)
-                except UndefinedCommandError as e:
+                except PolyError as e:
                     self.print_error(e)
                     exit = False
 
@@ -61,18 +68,31 @@ class Repl:
         expr1 = self.node.eval(expr0)
         self.print_result(expr1)
 
-        self.node.env.table["$"] = expr1
+        self.node.env["$"] = expr1
 
     def handle_command(self, cmd):
         if cmd in ["q", "quit"]:
             return True
         elif cmd[0] == " ":
             self.print_warning(cmd[1:])
+        elif cmd.split(" ", 1)[0] == "profile":
+            self.profile(cmd[len("profile"):].strip())
         else:
             raise UndefinedCommandError(cmd)
 
         return False
 
+    def profile(self, s):
+        expr = self.node.read(s)
+        val, profiler = self.node.profile(expr)
+        self.print_result(val)
+
+        with open(PROFILE_PATH, "w") as f:
+            f.write(profiler.collapsed())
+
+        puts(profiler.report(PROFILE_LIMIT))
+        puts("\nCollapsed stacks written to {}\n".format(PROFILE_PATH))
+
     def get_input(self):
         while True:
             try:
@@ -100,7 +120,12 @@ class Repl:
 
     def print_result(self, expr):
         prompt = colored.blue(self.out_prompt)
-        puts(prompt + str(expr) + "\n")
+        puts(prompt, newline=False)
+
+        for chunk in chunks(expr, MAX_DEPTH, MAX_LENGTH):
+            puts(chunk, newline=False)
+
+        puts("\n")
 
     def print_str(self, s):
         puts(s)
@@ -1,31 +1,51 @@
+import os
 import sys
+import uuid
+from socketserver import ThreadingMixIn
+from time import perf_counter
+from wsgiref.simple_server import WSGIServer
 
 from bottle import run, get, post, request, response, hook, static_file
 
 from poly.common import *
 from poly.node import *
-from poly.reader import ReaderError
+from poly.api import *
+from poly.metrics import ServerMetrics
+from poly.pool import Pool
+from poly.repl import PRELUDE, PRELUDE_IMAGE
 
-node = Node("main")
-node.load_module("prelude.poly", "")
+pool = None
+metrics = ServerMetrics()
 
 def server_main(args):
+    global pool
+
     config = {
         "host": "0.0.0.0",
         "port": 8000,
-        "debug": True
+        "debug": True,
+        "server_class": ThreadingWSGIServer
     }
 
+    workers = os.cpu_count() or 1
+    timeout = 10.0
+
     try:
         config["port"] = int(args[0])
+        workers = int(args[1])
+        timeout = float(args[2])
     except:
         pass
 
-    run(**config)
+    pool = Pool(workers, PRELUDE, PRELUDE_IMAGE, timeout)
+
+    try:
+        run(**config)
+    finally:
+        pool.close()
 
-class ServerError(Exception):
-    def __init__(self, message):
-        self.message = message
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
 
 @get("/")
 def repl():
@@ -51,17 +71,11 @@ def get_js(path):
 def completions():
     name = request.query.get("name")
 
-    if name is None:
-        err = ServerError("No input given")
-        return error_resp(err)
-
-    if len(name) <= 2:
-        err = ServerError("Input must be longer than 2 characters")
-        return error_resp(err)
-
-    has_prefix = lambda s: s.startswith(name)
-    matches = filter(has_prefix, node.names())
-    matches = sorted(matches)
+    try:
+        check_name(name)
+        matches = pool.complete(name, get_session())
+    except (ServerError, PolyError) as e:
+        return error_resp(e)
 
     return values_resp(matches)
 
@@ -74,35 +88,79 @@ def eval():
         return error_resp(err)
 
     s = s.strip()
+    start = perf_counter()
+
+    try:
+        kind, value = pool.eval(s, get_session())
+    except PolyError as e:
+        metrics.error(e)
+        return error_resp(e)
+    finally:
+        metrics.observe("eval", perf_counter() - start)
+
+    return result_resp(kind, value)
 
+@post("/batch")
+def batch():
     try:
-        expr = node.read(s)
-    except ReaderError as e:
+        batch = parse_batch(request.content_type, request.body.read())
+    except ServerError as e:
         return error_resp(e)
 
+    stop_on_error = request.query.get("stop") in ["1", "true"]
+    results = pool.eval_batch(batch, get_session(), stop_on_error)
+    start = perf_counter()
+
+    def resps():
+        try:
+            for kind, value in results:
+                yield result_resp(kind, value)
+        except PolyError as e:
+            metrics.error(e)
+            yield error_resp(e)
+        finally:
+            metrics.observe("batch", perf_counter() - start)
+
+    response.content_type = "application/json"
+    return json_array(resps())
+
+@post("/profile")
+def profile():
+    s = request.forms.get("input")
+
+    if s is None:
+        err = ServerError("No input given")
+        return error_resp(err)
+
+    start = perf_counter()
+
     try:
-        val = node.eval(expr)
+        kind, value, report, stacks = pool.profile(s.strip(), get_session())
     except PolyError as e:
+        metrics.error(e)
         return error_resp(e)
+    finally:
+        metrics.observe("profile", perf_counter() - start)
 
-    return expr_resp(val)
+    if kind == "expr" and request.query.get("format") == "collapsed":
+        response.content_type = "text/plain"
+        return stacks
 
-def expr_resp(val):
-    return {
-        "type": "expr",
-        "value": str(val)
-    }
+    return profile_resp(kind, value, report, stacks)
 
-def values_resp(vals):
-    return {
-        "values": list(vals)
-    }
+@get("/metrics")
+def get_metrics():
+    response.content_type = "text/plain; version=0.0.4"
+    return metrics.render(pool.metrics(), pool.retired)
 
-def error_resp(error):
-    return {
-        "type": "error",
-        "message": error.message
-    }
+def get_session():
+    session = request.get_cookie("session")
+
+    if session is None:
+        session = uuid.uuid4().hex
+        response.set_cookie("session", session)
+
+    return session
 
 if __name__ == "__main__":
     server_main(sys.argv[1:])
@@ -0,0 +1,39 @@
+import unittest
+
+from poly.array import IntOverflowError, numpy
+from util import eval_source, make_node
+
+INT_MAX = 2 ** 63 - 1
+
+@unittest.skipIf(numpy is None, "numpy isn't installed")
+class TestArray(unittest.TestCase):
+    def setUp(self):
+        self.node = make_node()
+
+    def eval(self, source):
+        return str(eval_source(self.node, source))
+
+    def assert_overflows(self, source):
+        self.assertRaises(IntOverflowError, self.eval, source)
+
+    def test_overflow(self):
+        self.assert_overflows("(+ (array {}) 1)".format(INT_MAX))
+        self.assert_overflows("(- (array (- 0 {} 1)))".format(INT_MAX))
+        self.assert_overflows("(- (array (- 0 {} 1)) 1)".format(INT_MAX))
+        self.assert_overflows("(* (array {0}) (array {0}))".format(2 ** 32))
+        self.assert_overflows("(+ (array 1) {})".format(2 ** 70))
+
+    def test_results_in_range(self):
+        self.assertEqual(self.eval("(+ (array {}) 1)".format(INT_MAX - 1)),
+                         "(array {})".format(INT_MAX))
+        self.assertEqual(self.eval("(* (array 3037000499) 3037000499)"),
+                         "(array 9223372030926249001)")
+        self.assertEqual(self.eval("(- (array 1 2))"), "(array -1 -2)")
+        self.assertEqual(self.eval("(+ (array 1 2) 0.5)"), "(array 1.5 2.5)")
+
+    def test_sum(self):
+        source = "(array/sum (array {0} {0}))".format(INT_MAX)
+        self.assertEqual(self.eval(source), str(2 * INT_MAX))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from poly.api import eval_source
+from poly.node import OutOfFuelError
+from util import make_node
+
+LOOPS = "(fn [x] (match x ([0 0] [_ (loop x)])))"
+
+class TestBudget(unittest.TestCase):
+    def setUp(self):
+        self.node = make_node(budget=10000)
+        eval_source(self.node, "(fn! loop [x] (loop x))")
+
+    def assert_out_of_fuel(self, source):
+        kind, message = eval_source(self.node, source)
+        self.assertEqual(kind, "error")
+        self.assertIn("ran out of fuel", message)
+
+    def test_eval(self):
+        self.assert_out_of_fuel("(loop 1)")
+
+    def test_printing_lazy_seqs(self):
+        self.assert_out_of_fuel(
+            "(lazy/map {} (lazy/range 0 10))".format(LOOPS))
+        self.assert_out_of_fuel(
+            "(lazy/filter {} (lazy/range 1 10))".format(LOOPS))
+        self.assert_out_of_fuel("(lazy/cons* 1 (fn [] (loop 1)))")
+
+    def test_forcing_outside_a_run(self):
+        val = self.node.eval(self.node.read(
+            "(lazy/map {} (lazy/range 0 10))".format(LOOPS)))
+        self.assertRaises(OutOfFuelError, str, val)
+        self.assertFalse(self.node.running)
+
+    def test_budget_is_restored(self):
+        self.assert_out_of_fuel("(loop 1)")
+        self.assertEqual(eval_source(self.node, "(+ 1 2)"), ("expr", "3"))
+
+if __name__ == "__main__":
+    unittest.main()
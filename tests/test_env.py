@@ -0,0 +1,44 @@
+import unittest
+
+from poly.expr import UndefinedError
+from util import eval_source, make_node
+
+class TestEnv(unittest.TestCase):
+    def setUp(self):
+        self.node = make_node()
+
+    def eval(self, source):
+        return str(eval_source(self.node, source))
+
+    def test_operatives_see_the_callers_env(self):
+        self.eval("(op! getx () e (eval 'x e))")
+        self.assertEqual(self.eval("(let ([x 1]) ((fn [] (getx))))"), "1")
+
+    def test_long_bodies(self):
+        nums = " ".join(str(i) for i in range(5000))
+        sources = ["(fn [] (list {}))", "(fn [] '({}))"]
+
+        for source in sources:
+            f = "(length ({}))".format(source.format(nums))
+            self.assertEqual(self.eval(f), "5000")
+
+    def test_lookups_follow_new_definitions(self):
+        self.eval("(fn! f [x] (+ x y))")
+        self.assertRaises(UndefinedError, self.eval, "(f 1)")
+
+        self.eval("(set! y 2)")
+        self.assertEqual(self.eval("(f 1)"), "3")
+
+        self.eval("(set! y 3)")
+        self.assertEqual(self.eval("(f 1)"), "4")
+
+    def test_local_bindings_shadow_new_definitions(self):
+        self.eval("(set! g (let ([z 1]) (fn [] z)))")
+        self.assertEqual(self.eval("(g)"), "1")
+
+        self.eval("(set! z 2)")
+        self.assertEqual(self.eval("(g)"), "1")
+        self.assertEqual(self.eval("z"), "2")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from poly.expr import Expr, Prim, Wrapped
+from util import eval_source, make_node
+
+class TestLazy(unittest.TestCase):
+    def setUp(self):
+        self.node = make_node()
+        self.calls = 0
+
+        def f(node, env, x):
+            self.calls += 1
+            return x
+
+        self.node.bind("f", Wrapped(Prim(f, None, (Expr,))))
+
+    def eval(self, source):
+        return str(eval_source(self.node, source))
+
+    def test_map_is_lazy(self):
+        self.eval("(set! s (lazy/map f (lazy/range 0 100)))")
+        self.assertEqual(self.calls, 1)
+
+        self.assertEqual(self.eval("(lazy/to-list (lazy/take 2 s))"), "(0 1)")
+        self.assertEqual(self.calls, 2)
+
+        self.eval("(lazy/to-list (lazy/take 2 s))")
+        self.assertEqual(self.calls, 2)
+
+    def test_filter_is_lazy(self):
+        source = "(lazy/take 2 (lazy/filter f (lazy/range 1 100)))"
+        self.assertEqual(self.eval("(lazy/to-list {})".format(source)),
+                         "(1 2)")
+        self.assertEqual(self.calls, 2)
+
+    def test_take_stops_early(self):
+        self.eval("(set! s (lazy/take 3 (lazy/map f (lazy/range 0 100))))")
+        self.assertEqual(self.eval("(lazy/to-list s)"), "(0 1 2)")
+        self.assertEqual(self.calls, 3)
+
+        self.assertEqual(self.eval("(lazy/to-list (lazy/take 0 s))"), "()")
+
+    def test_sparse_filter_on_infinite_seq(self):
+        self.eval("(fn! from [n] (lazy/cons* n (fn [] (from (+ n 1)))))")
+        source = ("(lazy/take 1 (lazy/filter"
+                  " (fn [x] (match x ([0 #t] [_ #f]))) (from 0)))")
+        self.assertEqual(self.eval("(lazy/to-list {})".format(source)), "(0)")
+
+    def test_vectors(self):
+        source = "(lazy/map f (vec 1 2 3))"
+        self.assertEqual(self.eval("(lazy/to-list {})".format(source)),
+                         "(1 2 3)")
+        self.assertEqual(self.calls, 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import re
+import unittest
+
+from util import eval_source, make_node, make_poly_node
+
+LIST_NAMES = re.compile(
+    r"\((foldr|foldl|reverse|map|filter|length|nth|range|apply|sort)(?=[\s)])")
+
+CASES = [
+    "(foldr cons () ())",
+    "(foldl + 0 ())",
+    "(reverse ())",
+    "(map inc ())",
+    "(filter id ())",
+    "(length ())",
+    "(range 0)",
+    "(sort ())",
+    "(apply + ())",
+    "(map inc (vec 1 2 3))",
+    "(filter (fn [x] (match x ([2 #f] [_ #t]))) (vec 1 2 3))",
+    "(foldr cons () (vec 1 2 3))",
+    "(foldl + 0 (vec 1 2 3))",
+    "(reverse (vec 1 2 3))",
+    "(length (vec))",
+    "(length (vec 1 2 3))",
+    "(nth (vec 1 2 3) 2)",
+    "(filter id '(#f #t #f))",
+    "(filter (fn [x] #f) '(1 2 3))",
+    "(map (fn [x] #f) '(1 2 3))",
+    "(range 3)",
+    "(sort '(3 1 2 3 1))",
+    "(sort '(#b #a #c #a))",
+    "(sort '(#b 2 \"s\" 1.5 #a 1 2))",
+    "(apply list '(1 2 3))",
+]
+
+WRAP_CASES = [
+    ("(eval* 'x)", "5"),
+    ("((wrap quote) 'x)", "x"),
+    ("((wrap (wrap quote)) 'x)", "5"),
+    ("(map (wrap quote) '(x x))", "(x x)"),
+    ("(map (wrap (wrap quote)) '(x x))", "(5 5)"),
+]
+
+class TestListLibrary(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.poly = make_poly_node()
+        cls.native = make_node()
+
+        for node in [cls.poly, cls.native]:
+            eval_source(node, "(set! x 5)")
+
+    def test_equivalence(self):
+        for source in CASES:
+            poly_source = LIST_NAMES.sub(r"(poly/\1", source)
+            expected = eval_source(self.poly, poly_source)
+
+            with self.subTest(source=source):
+                self.assertEqual(eval_source(self.native, source), expected)
+
+    def test_nested_wrap(self):
+        for source, expected in WRAP_CASES:
+            for node in [self.poly, self.native]:
+                with self.subTest(source=source):
+                    self.assertEqual(str(eval_source(node, source)), expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+
+from poly.api import eval_source
+from poly.printer import ELLIPSIS, MAX_LENGTH
+from util import make_node
+
+class TestPrinter(unittest.TestCase):
+    def setUp(self):
+        self.node = make_node()
+
+    def test_show_prints_everything(self):
+        n = MAX_LENGTH * 2
+        kind, value = eval_source(self.node, "(show (range {}))".format(n))
+
+        self.assertEqual(kind, "expr")
+        self.assertNotIn(ELLIPSIS, value)
+        self.assertTrue(value.endswith(' {})"'.format(n - 1)))
+
+    def test_results_are_bounded(self):
+        n = MAX_LENGTH * 2
+        kind, value = eval_source(self.node, "(range {})".format(n))
+
+        self.assertEqual(kind, "expr")
+        self.assertTrue(value.endswith(ELLIPSIS + ")"))
+
+if __name__ == "__main__":
+    unittest.main()
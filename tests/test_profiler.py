@@ -0,0 +1,39 @@
+import unittest
+
+from util import eval_source, make_node
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.node = make_node()
+        eval_source(self.node, """
+            (fn! loop [n] (match n ([0 #done] [_ (loop (- n 1))])))
+        """)
+        eval_source(self.node, """
+            (fn! fib [n]
+                (match n ([0 0] [1 1] [_ (+ (fib (- n 1)) (fib (- n 2)))])))
+        """)
+
+    def profile(self, source):
+        val, profiler = self.node.profile(self.node.read(source))
+
+        self.assertEqual(profiler.stack, [])
+        self.assertIsNone(self.node.profiler)
+
+        return str(val), profiler
+
+    def test_tail_calls(self):
+        val, profiler = self.profile("(loop 5000)")
+
+        self.assertEqual(val, "#done")
+        self.assertEqual(profiler.stats["loop"].calls, 5001)
+        self.assertLessEqual(max(len(path) for path in profiler.stacks), 2)
+
+    def test_recursion(self):
+        val, profiler = self.profile("(fib 10)")
+
+        self.assertEqual(val, "55")
+        self.assertEqual(profiler.stats["fib"].calls, 177)
+        self.assertEqual(profiler.stats["+"].calls, 88)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,23 @@
+import os
+
+import poly
+from poly.node import Node
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(poly.__file__)))
+PRELUDE = os.path.join(ROOT, "prelude.poly")
+LIST_LIBRARY = os.path.join(ROOT, "tests", "list.poly")
+
+def make_node(**kwargs):
+    node = Node("test", **kwargs)
+    node.load_module(PRELUDE, "")
+
+    return node
+
+def make_poly_node():
+    node = make_node()
+    node.load_module(LIST_LIBRARY)
+
+    return node
+
+def eval_source(node, source):
+    return node.eval(node.read(source))